@@ -9,6 +9,30 @@ COMPRESS_PORT = int(os.environ.get("COMPRESS_PORT", "50054"))
 ORCHESTRATOR_PORT = int(os.environ.get("ORCHESTRATOR_PORT", "8000"))
 ASR_PORT = int(os.environ.get("ASR_PORT", "50051"))
 
+# How the orchestrator runs each stage: "grpc" calls the stage's service,
+# "inproc" runs it in the orchestrator process on the event loop, and
+# "executor" runs it in-process on a worker thread. LID inference always
+# runs on the LID servicer's own executor, so its two in-process modes are
+# the same.
+VAD_MODE = os.environ.get("VAD_MODE", "grpc")
+DENOISE_MODE = os.environ.get("DENOISE_MODE", "grpc")
+LID_MODE = os.environ.get("LID_MODE", "grpc")
+COMPRESS_MODE = os.environ.get("COMPRESS_MODE", "grpc")
+
+# Orchestrator stages run as separate tasks linked by queues of this many
+# items (a WebSocket frame, or one stage's output for it); a full queue
+# makes the previous stage, and ultimately the WebSocket reader, wait.
+STAGE_QUEUE_SIZE = int(os.environ.get("STAGE_QUEUE_SIZE", "50"))
+
+# Language cache: once LID_CACHE_CONFIRMS consecutive results for a flow or
+# stream agree with score >= LID_CACHE_MIN_SCORE, later utterances reuse the
+# language for LID_CACHE_TTL_SEC, re-running LID every LID_CACHE_RECHECK-th
+# utterance (0 never rechecks).
+LID_CACHE_TTL_SEC = float(os.environ.get("LID_CACHE_TTL_SEC", "600"))
+LID_CACHE_MIN_SCORE = float(os.environ.get("LID_CACHE_MIN_SCORE", "0.8"))
+LID_CACHE_CONFIRMS = int(os.environ.get("LID_CACHE_CONFIRMS", "2"))
+LID_CACHE_RECHECK = int(os.environ.get("LID_CACHE_RECHECK", "5"))
+
 LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO")
 LOG_FORMAT = os.environ.get(
     "LOG_FORMAT", "%(asctime)s %(levelname)s [%(name)s] %(message)s"
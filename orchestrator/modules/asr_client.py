@@ -2,6 +2,7 @@
 
 import asyncio
 import logging
+
 import grpc
 
 from config import ASR_PORT
@@ -10,29 +11,85 @@ from ..protos import asr_pb2, asr_pb2_grpc
 logger = logging.getLogger(__name__)
 
 
+def result_message(flow_id: str, res: asr_pb2.Result) -> dict:
+    """Convert a recognition result into the client's ``asr_partial``/``asr_final`` event."""
+    return {
+        "type": "asr_final" if res.is_final else "asr_partial",
+        "flowId": flow_id,
+        "text": res.text,
+        "startMs": res.start_ms,
+        "endMs": res.end_ms,
+    }
+
+
 class AsrClient:
-    def __init__(self, flow_id: str, target: str = f"asr:{ASR_PORT}") -> None:
+    """Stream one utterance's Opus packets to ASR per ``Stream`` call.
+
+    ``start`` opens the stream, ``send`` writes packets and ``end_segment``
+    marks a finished VAD segment; ``set_language`` passes on a language
+    that was not known at ``start``. A reader task runs alongside the writes
+    and puts each result, converted to a WebSocket event, on ``outbox`` in
+    the order the service sent them. ``flush`` ends the utterance once all
+    its results are queued; the next ``start`` opens a new stream.
+    """
+
+    def __init__(self, flow_id: str, outbox=None, target: str = f"asr:{ASR_PORT}") -> None:
         self.flow_id = flow_id
+        self.outbox = outbox
         self.channel = grpc.aio.insecure_channel(target)
         self.stub = asr_pb2_grpc.RecognizeStub(self.channel)
         self.stream = None
+        self._reader: asyncio.Task | None = None
+        self.language: str | None = None  # language sent on the current stream
+
+    async def start(self, language: str | None = None) -> None:
+        self.stream = self.stub.Stream()
+        self._reader = asyncio.create_task(self._read(self.stream))
+        self.language = language
+        logger.info("[%s] ASR stream start language=%s", self.flow_id, language)
+        start = asr_pb2.Start(flow_id=self.flow_id, codec="opus", sr=16000, language=language)
+        await self.stream.write(asr_pb2.ClientFrame(start=start))
+
+    async def _read(self, stream) -> None:
+        try:
+            async for res in stream:
+                logger.debug("[%s] ASR result: %s", self.flow_id, res)
+                if self.outbox is not None:
+                    self.outbox.put(result_message(self.flow_id, res))
+        except grpc.aio.AioRpcError as e:
+            logger.error("[%s] ASR stream error: %s", self.flow_id, e)
 
     async def send(self, opus_pkt: bytes, language: str | None = None) -> None:
         if not self.stream:
-            self.stream = self.stub.Stream()
-            start = asr_pb2.Start(flow_id=self.flow_id, codec="opus", sr=16000, language=language)
-            await self.stream.write(asr_pb2.ClientFrame(start=start))
+            await self.start(language)
         logger.debug("[%s] ASR send %d bytes", self.flow_id, len(opus_pkt))
         await self.stream.write(
             asr_pb2.ClientFrame(opus=asr_pb2.OpusPacket(data=opus_pkt))
         )
 
+    async def end_segment(self) -> None:
+        if self.stream:
+            await self.stream.write(asr_pb2.ClientFrame(end_of_segment=True))
+
+    async def set_language(self, language: str | None) -> None:
+        if self.stream and language and language != self.language:
+            logger.info("[%s] ASR language %s", self.flow_id, language)
+            self.language = language
+            await self.stream.write(asr_pb2.ClientFrame(language=language))
+
     async def flush(self) -> None:
+        """Finish writing the utterance and wait until all its results are queued."""
         if self.stream:
             await self.stream.done_writing()
-            async for evt in self.stream:
-                logger.info("[%s] ASR result: %s", self.flow_id, evt)
-            
+            await self._reader
+            self.stream = None
+            self._reader = None
+            self.language = None
+
     def close(self) -> None:
+        if self._reader is not None:
+            self._reader.cancel()
+        if self.stream is not None:
+            self.stream.cancel()
         if self.channel:
             self.channel.close()
@@ -5,36 +5,178 @@ import logging
 import numpy as np
 import grpc
 
-from config import COMPRESS_PORT, configure_logging
+from config import COMPRESS_MODE, COMPRESS_PORT, configure_logging
 from services.compress.protos import compress_pb2, compress_pb2_grpc  # type: ignore
+from ..utils.opus_codec import PcmToOpus
 
 logger = logging.getLogger(__name__)
 
+# Samples per Opus packet (20 ms at 16 kHz).
+FRAME_SAMPLES = 16000 * 20 // 1000
+
 
 class CompressClient:
-    def __init__(self, target: str = f"localhost:{COMPRESS_PORT}") -> None:
-        self.channel = grpc.aio.insecure_channel(target)
+    def __init__(self, target: str = f"localhost:{COMPRESS_PORT}", flow_id: str = "default") -> None:
+        self.flow_id = flow_id
+        # A private subchannel gives each flow its own connection, so a
+        # multi-process Compress service keeps the flow on one worker.
+        self.channel = grpc.aio.insecure_channel(
+            target, options=[("grpc.use_local_subchannel_pool", 1)]
+        )
         self.stub = compress_pb2_grpc.CompressStub(self.channel)
-        self.frame_samples = 16000 * 20 // 1000
+        self.frame_samples = FRAME_SAMPLES
+        # PCM is streamed to the server in chunks of this many bytes; the
+        # server does the 20 ms framing itself.
+        self.chunk_bytes = self.frame_samples * 2 * 50
+        self.stream = None
+        self._reader: asyncio.Task | None = None
+        self._ready: list[bytes] = []
+        self._sent = 0
+
+    async def feed(self, pcm_bytes: bytes) -> list[bytes]:
+        """Stream PCM to the encoder as it arrives and return packets ready so far.
+
+        Partial frames are carried over by the server; the first call opens
+        an ``EncodeStream`` that stays open until ``finish``.
+        """
+        if pcm_bytes:
+            if self.stream is None:
+                self.stream = self.stub.EncodeStream()
+                self._reader = asyncio.create_task(self._read(self.stream))
+                await self.stream.write(compress_pb2.PCM(data=pcm_bytes, flow_id=self.flow_id))
+            else:
+                await self.stream.write(compress_pb2.PCM(data=pcm_bytes))
+            self._sent += len(pcm_bytes)
+        return self._take()
+
+    async def finish(self) -> list[bytes]:
+        """Encode the padded tail frame, close the stream and return remaining packets.
+
+        The client is reset even if the call failed, so the next ``feed``
+        opens a fresh stream; the failure is raised to the caller.
+        """
+        if self.stream is None:
+            return []
+        stream, reader = self.stream, self._reader
+        try:
+            tail = self._sent % (self.frame_samples * 2)
+            if tail:
+                await stream.write(compress_pb2.PCM(data=bytes(self.frame_samples * 2 - tail)))
+            await stream.done_writing()
+            await reader
+            return self._take()
+        finally:
+            if not reader.done():
+                stream.cancel()
+                reader.cancel()
+            self.stream = None
+            self._reader = None
+            self._sent = 0
+            self._ready = []
+
+    async def _read(self, stream) -> None:
+        async for resp in stream:
+            self._ready.append(resp.data)
+
+    def _take(self) -> list[bytes]:
+        packets, self._ready = self._ready, []
+        return packets
 
     async def encode(self, pcm_bytes: bytes) -> list[bytes]:
+        """Encode PCM over one ``EncodeStream`` call instead of a call per frame."""
         logger.debug("compress %d bytes", len(pcm_bytes))
+        if len(pcm_bytes) < self.frame_samples * 2:
+            return []
+
+        async def requests():
+            yield compress_pb2.PCM(data=pcm_bytes[: self.chunk_bytes], flow_id=self.flow_id)
+            for i in range(self.chunk_bytes, len(pcm_bytes), self.chunk_bytes):
+                yield compress_pb2.PCM(data=pcm_bytes[i : i + self.chunk_bytes])
+
+        packets = [resp.data async for resp in self.stub.EncodeStream(requests())]
+        logger.debug("compress -> %d packets", len(packets))
+        return packets
+
+    async def encode_unary(self, pcm_bytes: bytes) -> list[bytes]:
+        """Encode PCM with one unary ``Encode`` call per 20 ms frame."""
+        logger.debug("compress unary %d bytes", len(pcm_bytes))
         pcm = np.frombuffer(pcm_bytes, dtype=np.int16)
         packets: list[bytes] = []
         for i in range(0, len(pcm), self.frame_samples):
             frame = pcm[i : i + self.frame_samples]
             if len(frame) < self.frame_samples:
                 break
-            req = compress_pb2.PCM(data=frame.tobytes())
+            req = compress_pb2.PCM(data=frame.tobytes(), flow_id=self.flow_id)
             resp = await self.stub.Encode(req)
             packets.append(resp.data)
         logger.debug("compress -> %d packets", len(packets))
         return packets
 
     def close(self) -> None:
+        if self.stream is not None:
+            self.stream.cancel()
         self.channel.close()
 
 
+class LocalCompressClient:
+    """Encode PCM in-process, skipping the gRPC hop.
+
+    Encoding runs on a worker thread, or directly on the event loop when
+    ``inline`` is set (a 20 ms frame takes well under a millisecond).
+    """
+
+    def __init__(self, flow_id: str = "default", executor=None, inline: bool = False) -> None:
+        self.flow_id = flow_id
+        self.executor = executor
+        self.inline = inline
+        self.codec: PcmToOpus | None = None
+
+    async def _run(self, fn, *args):
+        if self.inline:
+            return fn(*args)
+        return await asyncio.get_running_loop().run_in_executor(self.executor, fn, *args)
+
+    async def feed(self, pcm_bytes: bytes) -> list[bytes]:
+        """Encode the complete frames in ``pcm_bytes``, carrying the remainder."""
+        if not pcm_bytes:
+            return []
+        if self.codec is None:
+            self.codec = PcmToOpus()
+        codec = self.codec
+        return await self._run(lambda: list(codec.encode(pcm_bytes)))
+
+    async def finish(self) -> list[bytes]:
+        """Encode the padded tail frame and start afresh for the next utterance."""
+        codec, self.codec = self.codec, None
+        if codec is None:
+            return []
+        return await self._run(lambda: list(codec.flush()))
+
+    async def encode(self, pcm_bytes: bytes) -> list[bytes]:
+        logger.debug("compress local %d bytes", len(pcm_bytes))
+        packets = await self._run(self._encode, pcm_bytes)
+        logger.debug("compress -> %d packets", len(packets))
+        return packets
+
+    @staticmethod
+    def _encode(pcm_bytes: bytes) -> list[bytes]:
+        return list(PcmToOpus().encode(pcm_bytes))
+
+    def close(self) -> None:
+        pass
+
+
+def make_compress_client(flow_id: str, mode: str = COMPRESS_MODE):
+    """Return the compression client configured by ``COMPRESS_MODE``."""
+    if mode == "executor":
+        return LocalCompressClient(flow_id=flow_id)
+    if mode == "inproc":
+        return LocalCompressClient(flow_id=flow_id, inline=True)
+    if mode == "grpc":
+        return CompressClient(flow_id=flow_id)
+    raise ValueError(f"unknown compress mode {mode!r}")
+
+
 if __name__ == "__main__":
     async def _test():
         import os
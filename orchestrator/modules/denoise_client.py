@@ -10,16 +10,44 @@ logger = logging.getLogger(__name__)
 
 
 class DenoiseClient:
+    """Denoise a flow over one ``CleanStream`` call.
+
+    The service keeps the filter state, so ``send`` returns the samples
+    completed so far, lagging the input by the filter latency; ``flush``
+    returns the rest at the end of an utterance, leaving the stream open.
+    """
+
     def __init__(self, target: str = f"localhost:{DENOISE_PORT}") -> None:
         self.channel = grpc.aio.insecure_channel(target)
         self.stub = denoise_pb2_grpc.DenoiseStub(self.channel)
+        self.stream = None
+
+    async def _call(self, request: denoise_pb2.Audio) -> bytes:
+        if self.stream is None:
+            self.stream = self.stub.CleanStream()
+        await self.stream.write(request)
+        # The service answers every request once and in order.
+        response = await self.stream.read()
+        if response is grpc.aio.EOF:
+            self.stream = None
+            raise ConnectionError("denoise stream closed")
+        return response.pcm
 
     async def send(self, pcm_bytes: bytes) -> bytes:
         logger.debug("denoise send %d bytes", len(pcm_bytes))
-        request = denoise_pb2.Audio(pcm=pcm_bytes, sample_rate=16000)
-        response = await self.stub.Clean(request)
-        logger.debug("denoise recv %d bytes", len(response.pcm))
-        return response.pcm
+        pcm = await self._call(denoise_pb2.Audio(pcm=pcm_bytes, sample_rate=16000))
+        logger.debug("denoise recv %d bytes", len(pcm))
+        return pcm
+
+    async def flush(self) -> bytes:
+        """Return the audio still held back by the filter."""
+        if self.stream is None:
+            return b""
+        pcm = await self._call(denoise_pb2.Audio(sample_rate=16000, flush=True))
+        logger.debug("denoise flush recv %d bytes", len(pcm))
+        return pcm
 
     def close(self) -> None:
+        if self.stream is not None:
+            self.stream.cancel()
         self.channel.close()
@@ -0,0 +1,89 @@
+"""Per-speaker language cache used to skip repeated LID calls."""
+
+import logging
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+from config import LID_CACHE_CONFIRMS, LID_CACHE_MIN_SCORE, LID_CACHE_RECHECK, LID_CACHE_TTL_SEC
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _Entry:
+    language: str
+    confirms: int
+    expires: float
+    since_check: int = 0
+
+
+class LanguageCache:
+    """Remember the language of a flow or named stream between utterances.
+
+    A language is established once ``confirms`` consecutive LID results
+    agree with a score of at least ``min_score``. After that ``lookup``
+    returns it, so the utterance can skip LID, except every ``recheck``-th
+    time (0 never rechecks) and once ``ttl_sec`` has passed since the last
+    confident result. A confident result for a different language starts
+    over; low-score results neither establish nor overturn an entry.
+    """
+
+    def __init__(
+        self,
+        ttl_sec: float = LID_CACHE_TTL_SEC,
+        min_score: float = LID_CACHE_MIN_SCORE,
+        confirms: int = LID_CACHE_CONFIRMS,
+        recheck: int = LID_CACHE_RECHECK,
+    ) -> None:
+        self.ttl_sec = ttl_sec
+        self.min_score = min_score
+        self.confirms = max(1, confirms)
+        self.recheck = recheck
+        self._entries: Dict[str, _Entry] = {}
+        self.lookups = 0
+        self.hits = 0
+
+    def lookup(self, key: str) -> Optional[str]:
+        """Return the established language for ``key``, or None if LID should run."""
+        self.lookups += 1
+        entry = self._entries.get(key)
+        if entry is None or entry.confirms < self.confirms:
+            return None
+        if entry.expires <= time.monotonic():
+            del self._entries[key]
+            return None
+        entry.since_check += 1
+        if self.recheck and entry.since_check >= self.recheck:
+            entry.since_check = 0
+            return None
+        self.hits += 1
+        return entry.language
+
+    def update(self, key: str, language: Optional[str], score: float) -> None:
+        """Record a LID result for ``key``."""
+        if not language or score < self.min_score:
+            return
+        now = time.monotonic()
+        entry = self._entries.get(key)
+        if entry is None or entry.language != language:
+            if entry is not None:
+                logger.info("[%s] language changed %s -> %s", key, entry.language, language)
+            self._entries[key] = _Entry(language, 1, now + self.ttl_sec)
+        else:
+            entry.confirms += 1
+            entry.expires = now + self.ttl_sec
+        self._prune(now)
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "entries": len(self._entries),
+            "lookups": self.lookups,
+            "hits": self.hits,
+            "hitRate": self.hits / self.lookups if self.lookups else 0.0,
+            "lidCallsSaved": self.hits,
+        }
+
+    def _prune(self, now: float) -> None:
+        for key in [k for k, e in self._entries.items() if e.expires <= now]:
+            del self._entries[key]
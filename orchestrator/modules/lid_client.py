@@ -1,5 +1,6 @@
 """gRPC client for language identification."""
 
+import asyncio
 import logging
 import grpc
 
@@ -10,27 +11,74 @@ logger = logging.getLogger(__name__)
 
 
 class LidClient:
+    """Stream an utterance to ``StreamDetect`` while it is being spoken.
+
+    Audio is sent as it is fed; once the service returns a final label,
+    further audio is no longer sent. ``flush`` returns the label and gets
+    the client ready for the next utterance.
+    """
+
     def __init__(self, flow_id: str, target: str = f"localhost:{LID_PORT}") -> None:
         self.flow_id = flow_id
         self.channel = grpc.aio.insecure_channel(target)
         self.stub = lid_pb2_grpc.LIDStub(self.channel)
-        self.buffer = bytearray()
+        self.stream = None
+        self._reader: asyncio.Task | None = None
+        self.result: lid_pb2.LIDResponse | None = None
+        self.sent = 0
+        self.score = 0.0  # score of the last flushed result
+
+    async def feed(self, pcm_bytes: bytes) -> None:
+        """Send PCM for language identification unless the language is already final."""
+        if self.result is not None and self.result.final:
+            return
+        if self.stream is None:
+            self.stream = self.stub.StreamDetect()
+            self._reader = asyncio.create_task(self._read(self.stream))
+        try:
+            await self.stream.write(lid_pb2.LIDChunk(pcm=pcm_bytes, sample_rate=16000))
+        except (grpc.aio.UsageError, asyncio.InvalidStateError):
+            return  # the service finished the stream between our check and the write
+        except grpc.aio.AioRpcError:
+            return  # the stream failed; the reader logs the error
+        self.sent += len(pcm_bytes)
+        logger.debug("[%s] LID sent %d bytes", self.flow_id, self.sent)
 
-    def feed(self, pcm_bytes: bytes) -> None:
-        """Collect PCM for language identification."""
-        self.buffer.extend(pcm_bytes)
-        logger.debug("[%s] LID buffered %d bytes", self.flow_id, len(self.buffer))
+    async def _read(self, stream) -> None:
+        try:
+            async for resp in stream:
+                self.result = resp
+                if resp.final:
+                    logger.info(
+                        "[%s] LID final %s (%.3f) after %d bytes", self.flow_id, resp.language, resp.score, self.sent
+                    )
+        except grpc.aio.AioRpcError as e:
+            logger.error("[%s] LID stream error: %s", self.flow_id, e)
 
     async def flush(self) -> str | None:
-        """Send accumulated audio and return detected language."""
-        if not self.buffer:
+        """Finish the utterance and return the detected language."""
+        if self.stream is None:
+            self.score = 0.0
             return None
-        logger.debug("[%s] LID flush %d bytes", self.flow_id, len(self.buffer))
-        request = lid_pb2.LIDRequest(pcm=bytes(self.buffer), sample_rate=16000)
-        resp = await self.stub.Detect(request)
-        self.buffer.clear()
-        logger.info("[%s] LID detected %s", self.flow_id, resp.language)
-        return resp.language
+        if self.result is None or not self.result.final:
+            try:
+                await self.stream.write(lid_pb2.LIDChunk(end=True))
+                await self.stream.done_writing()
+            except (grpc.aio.UsageError, asyncio.InvalidStateError, grpc.aio.AioRpcError):
+                pass
+        await self._reader
+        language = self.result.language if self.result is not None else None
+        self.score = self.result.score if self.result is not None else 0.0
+        logger.info("[%s] LID detected %s", self.flow_id, language)
+        self.stream = None
+        self._reader = None
+        self.result = None
+        self.sent = 0
+        return language
 
     def close(self) -> None:
+        if self._reader is not None:
+            self._reader.cancel()
+        if self.stream is not None:
+            self.stream.cancel()
         self.channel.close()
@@ -0,0 +1,43 @@
+"""Ordered single-writer queue for a flow's WebSocket messages."""
+
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class Outbox:
+    """Send messages to one WebSocket from a single task, in ``put`` order.
+
+    Any task may ``put`` without waiting for the client, and messages from
+    different producers (ASR results, pipeline events) never interleave out
+    of order. ``drain`` waits until everything queued so far is written, or
+    until the outbox is closed.
+    """
+
+    def __init__(self, flow_id: str, ws) -> None:
+        self.flow_id = flow_id
+        self.ws = ws
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self.task = asyncio.create_task(self._write())
+
+    def put(self, msg: dict) -> None:
+        self.queue.put_nowait(msg)
+
+    async def drain(self) -> None:
+        join = asyncio.ensure_future(self.queue.join())
+        await asyncio.wait([join, self.task], return_when=asyncio.FIRST_COMPLETED)
+        join.cancel()
+
+    async def _write(self) -> None:
+        while True:
+            msg = await self.queue.get()
+            try:
+                await self.ws.write_message(msg)
+            except Exception as e:
+                logger.warning("[%s] dropped %s event: %s", self.flow_id, msg.get("type"), e)
+            finally:
+                self.queue.task_done()
+
+    def close(self) -> None:
+        self.task.cancel()
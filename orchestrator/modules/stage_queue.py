@@ -0,0 +1,42 @@
+"""Bounded queue linking two pipeline stages."""
+
+import asyncio
+import time
+
+from config import STAGE_QUEUE_SIZE
+
+
+class StageQueue(asyncio.Queue):
+    """``asyncio.Queue`` that records its depth and how long producers stalled.
+
+    ``put`` waits while the queue is full; the time spent waiting is the
+    backpressure the consuming stage applies to the producing one.
+    """
+
+    def __init__(self, name: str, maxsize: int = STAGE_QUEUE_SIZE) -> None:
+        super().__init__(maxsize)
+        self.name = name
+        self.puts = 0
+        self.max_depth = 0
+        self.stalls = 0
+        self.stall_time = 0.0
+
+    async def put(self, item) -> None:
+        if self.full():
+            self.stalls += 1
+            t0 = time.perf_counter()
+            await super().put(item)
+            self.stall_time += time.perf_counter() - t0
+        else:
+            self.put_nowait(item)
+        self.puts += 1
+        self.max_depth = max(self.max_depth, self.qsize())
+
+    def stats(self) -> dict:
+        return {
+            "depth": self.qsize(),
+            "maxDepth": self.max_depth,
+            "puts": self.puts,
+            "stalls": self.stalls,
+            "stallMs": round(self.stall_time * 1000, 1),
+        }
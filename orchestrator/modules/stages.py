@@ -0,0 +1,263 @@
+"""Choose, per stage, between the gRPC services and in-process execution.
+
+``VAD_MODE``, ``DENOISE_MODE``, ``LID_MODE`` and ``COMPRESS_MODE`` take
+``"grpc"``, ``"inproc"`` or ``"executor"``. The in-process clients run the
+same code the services run and expose the same methods as the gRPC
+clients, so the pipeline does not care which one it holds.
+"""
+
+import asyncio
+import logging
+
+from config import COMPRESS_MODE, DENOISE_MODE, LID_MODE, VAD_MODE
+from services.vad.protos import vad_pb2
+from services.lid.protos import lid_pb2  # type: ignore
+
+from . import compress_client, denoise_client, lid_client, vad_client
+
+logger = logging.getLogger(__name__)
+
+STAGE_MODES = ("grpc", "inproc", "executor")
+DEFAULT_MODES = {"vad": VAD_MODE, "denoise": DENOISE_MODE, "lid": LID_MODE, "compress": COMPRESS_MODE}
+
+# Model-backed state shared by all in-process flows, created on first use.
+_vad_pool = None
+_lid_servicer = None
+
+
+def _check(stage: str, mode: str) -> None:
+    if mode not in STAGE_MODES:
+        raise ValueError(f"unknown {stage} mode: {mode}")
+
+
+class _LocalStage:
+    """Run a stage's calls inline or on the default executor.
+
+    Executor jobs are awaited through ``asyncio.shield``, so a cancelled
+    stage leaves ``_job`` tracking the worker until it finishes; ``close``
+    uses ``_when_idle`` to avoid releasing state a worker still uses.
+    """
+
+    inline = False
+    _job: asyncio.Future | None = None
+
+    async def _call(self, fn, *args):
+        if self.inline:
+            return fn(*args)
+        self._job = asyncio.get_running_loop().run_in_executor(None, fn, *args)
+        try:
+            return await asyncio.shield(self._job)
+        finally:
+            self._job = None
+
+    def _when_idle(self, fn) -> None:
+        """Call ``fn`` now, or once the executor job in flight has finished."""
+        job = self._job
+        if job is not None and not job.done():
+            job.add_done_callback(lambda _: fn())
+        else:
+            fn()
+
+
+class LocalVadClient(_LocalStage):
+    """VAD on a pooled ``VadSession`` in the orchestrator process."""
+
+    def __init__(self, flow_id: str = "default", inline: bool = False) -> None:
+        global _vad_pool
+        if _vad_pool is None:
+            from services.vad.pool import VadSessionPool
+
+            _vad_pool = VadSessionPool()
+        self.flow_id = flow_id
+        self.inline = inline
+        self.pool = _vad_pool
+        self.sess = None
+        self._queue: asyncio.Queue = asyncio.Queue()
+
+    @staticmethod
+    def _accept(sess, pcm_bytes: bytes) -> list:
+        sess.accept_pcm16(pcm_bytes)
+        return sess.pop_segments()
+
+    async def write(self, pcm_bytes: bytes) -> None:
+        """Accept a frame; the ``ServerFrame``s it completes go to ``segments()``."""
+        if self.sess is None:
+            self.sess = self.pool.acquire()
+        for seg in await self._call(self._accept, self.sess, pcm_bytes):
+            self._queue.put_nowait(_segment_frame(seg))
+
+    async def segments(self):
+        """Yield ``ServerFrame``s in order, until ``close``."""
+        while True:
+            frame = await self._queue.get()
+            if frame is None:
+                return
+            yield frame
+
+    async def end_utterance(self) -> None:
+        """End the current utterance; ``segments()`` yields its frames, then the marker."""
+        try:
+            if self.sess is not None:
+                for seg in await self._call(self.sess.end_utterance):
+                    self._queue.put_nowait(_segment_frame(seg))
+        finally:
+            self._queue.put_nowait(vad_pb2.ServerFrame(end_of_utterance=True))
+
+    def close(self) -> None:
+        if self.sess is not None:
+            logger.info("[%s] VAD chunks %s", self.flow_id, self.sess.stats())
+            sess, self.sess = self.sess, None
+            self._when_idle(lambda: self.pool.release(sess))
+        self._queue.put_nowait(None)
+
+
+def _segment_frame(seg) -> vad_pb2.ServerFrame:
+    return vad_pb2.ServerFrame(
+        pcm=vad_pb2.Pcm(data=seg.pcm),
+        start_sample=seg.start,
+        end_sample=seg.end,
+        end_of_segment=seg.end_of_segment,
+    )
+
+
+class LocalDenoiseClient(_LocalStage):
+    """Run the ``SpectralDenoiser`` in the orchestrator process."""
+
+    def __init__(self, inline: bool = False) -> None:
+        from services.denoise.spectral import SpectralDenoiser
+
+        self.inline = inline
+        self.den = SpectralDenoiser(sr=16000)
+
+    async def send(self, pcm_bytes: bytes) -> bytes:
+        return await self._call(self.den.process_pcm16, pcm_bytes)
+
+    async def flush(self) -> bytes:
+        """Return the audio still held back by the filter."""
+        return await self._call(self.den.flush_pcm16)
+
+    def close(self) -> None:
+        self._when_idle(self.den.reset)
+
+
+class _LocalContext:
+    """The parts of a gRPC servicer context ``LIDServicer`` uses."""
+
+    async def abort(self, code, details: str):
+        raise RuntimeError(f"LID {code.name}: {details}")
+
+    def set_trailing_metadata(self, metadata) -> None:
+        pass
+
+
+class LocalLidClient:
+    """Drive ``LIDServicer.StreamDetect`` in the orchestrator process.
+
+    Chunks go through a queue instead of a gRPC stream; inference runs on
+    the servicer's ``InferenceExecutor`` as it does in the service.
+    """
+
+    def __init__(self, flow_id: str) -> None:
+        global _lid_servicer
+        if _lid_servicer is None:
+            # Importing the server module loads the LID model.
+            from services.lid.batch import LID_BATCH_WAIT_MS, LidBatcher
+            from services.lid.executor import InferenceExecutor
+            from services.lid.server import LIDServicer, classify_pcm_batch
+
+            executor = InferenceExecutor()
+            batcher = LidBatcher(classify_pcm_batch, executor) if LID_BATCH_WAIT_MS > 0 else None
+            _lid_servicer = LIDServicer(executor, batcher)
+        self.flow_id = flow_id
+        self.servicer = _lid_servicer
+        self._queue: asyncio.Queue | None = None
+        self._reader: asyncio.Task | None = None
+        self.result: lid_pb2.LIDResponse | None = None
+        self.sent = 0
+        self.score = 0.0  # score of the last flushed result
+
+    async def feed(self, pcm_bytes: bytes) -> None:
+        """Queue PCM for language identification unless the language is already final."""
+        if self.result is not None and self.result.final:
+            return
+        if self._queue is None:
+            self._queue = asyncio.Queue()
+            self._reader = asyncio.create_task(self._read(self._queue))
+        self._queue.put_nowait(lid_pb2.LIDChunk(pcm=pcm_bytes, sample_rate=16000))
+        self.sent += len(pcm_bytes)
+
+    @staticmethod
+    async def _requests(queue: asyncio.Queue):
+        while True:
+            chunk = await queue.get()
+            if chunk is None:
+                return
+            yield chunk
+
+    async def _read(self, queue: asyncio.Queue) -> None:
+        try:
+            async for resp in self.servicer.StreamDetect(self._requests(queue), _LocalContext()):
+                self.result = resp
+                if resp.final:
+                    logger.info(
+                        "[%s] LID final %s (%.3f) after %d bytes", self.flow_id, resp.language, resp.score, self.sent
+                    )
+        except RuntimeError as e:
+            logger.error("[%s] LID stream error: %s", self.flow_id, e)
+
+    async def flush(self) -> str | None:
+        """Finish the utterance and return the detected language."""
+        if self._queue is None:
+            self.score = 0.0
+            return None
+        self._queue.put_nowait(lid_pb2.LIDChunk(end=True))
+        self._queue.put_nowait(None)
+        await self._reader
+        language = self.result.language if self.result is not None else None
+        self.score = self.result.score if self.result is not None else 0.0
+        logger.info("[%s] LID detected %s", self.flow_id, language)
+        self._queue = None
+        self._reader = None
+        self.result = None
+        self.sent = 0
+        return language
+
+    def close(self) -> None:
+        if self._reader is not None:
+            self._reader.cancel()
+
+
+def make_vad(flow_id: str, mode: str = VAD_MODE):
+    _check("VAD", mode)
+    if mode == "grpc":
+        return vad_client.VadClient(flow_id=flow_id)
+    return LocalVadClient(flow_id, inline=mode == "inproc")
+
+
+def make_denoise(flow_id: str, mode: str = DENOISE_MODE):
+    _check("denoise", mode)
+    if mode == "grpc":
+        return denoise_client.DenoiseClient()
+    return LocalDenoiseClient(inline=mode == "inproc")
+
+
+def make_lid(flow_id: str, mode: str = LID_MODE):
+    _check("LID", mode)
+    if mode == "grpc":
+        return lid_client.LidClient(flow_id)
+    return LocalLidClient(flow_id)
+
+
+def make_compress(flow_id: str, mode: str = COMPRESS_MODE):
+    return compress_client.make_compress_client(flow_id, mode)
+
+
+def make_stages(flow_id: str, modes: dict | None = None) -> dict:
+    """Build a flow's stage clients; ``modes`` overrides the configured mode per stage."""
+    modes = {**DEFAULT_MODES, **(modes or {})}
+    return {
+        "vad": make_vad(flow_id, modes["vad"]),
+        "denoise": make_denoise(flow_id, modes["denoise"]),
+        "lid": make_lid(flow_id, modes["lid"]),
+        "compress": make_compress(flow_id, modes["compress"]),
+    }
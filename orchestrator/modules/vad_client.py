@@ -2,6 +2,8 @@
 
 import asyncio
 import logging
+from typing import AsyncIterator
+
 import grpc
 
 from config import VAD_PORT
@@ -11,41 +13,96 @@ logger = logging.getLogger(__name__)
 
 
 class VadClient:
+    """Stream PCM to the VAD service.
+
+    ``write`` sends frames; a background task reads ``ServerFrame``s as soon
+    as the server yields them, and ``segments()`` yields them in order across
+    the flow's streams. Each ``ServerFrame`` carries the sample offsets of its
+    audio and marks the frame completing a segment.
+
+    ``end_utterance`` ends the current utterance but keeps the stream, and the
+    server-side session behind it, open for the next one; ``segments()``
+    yields an ``end_of_utterance`` frame once the utterance is drained, even
+    if the stream failed meanwhile. ``end`` closes the stream.
+    """
+
     def __init__(self, target: str = f"localhost:{VAD_PORT}", flow_id: str = "default"):
         self.flow_id = flow_id
         self.channel = grpc.aio.insecure_channel(target)
         self.stub = vad_pb2_grpc.VoiceActivityStub(self.channel)
         self.stream = None
+        self._reader: asyncio.Task | None = None
+        self._queue: asyncio.Queue = asyncio.Queue()
+        # end_utterance requests whose marker frame has not arrived yet.
+        self._utterances = 0
 
     async def _ensure_stream(self) -> None:
         if self.stream is None:
             self.stream = self.stub.Stream()
+            self._reader = asyncio.create_task(self._read(self.stream))
             start = vad_pb2.Start(flow_id=self.flow_id, sample_rate=16000)
             await self.stream.write(vad_pb2.ClientFrame(start=start))
 
-    async def send(self, pcm_bytes: bytes) -> bytes:
+    async def _read(self, stream) -> None:
+        """Queue server frames as they arrive."""
+        try:
+            async for resp in stream:
+                logger.debug(
+                    "[%s] VAD recv %d bytes [%d, %d) eos=%s", self.flow_id, len(resp.pcm.data),
+                    resp.start_sample, resp.end_sample, resp.end_of_segment,
+                )
+                if resp.end_of_utterance:
+                    self._utterances -= 1
+                self._queue.put_nowait(resp)
+        except grpc.aio.AioRpcError as e:
+            logger.error("[%s] VAD stream error: %s", self.flow_id, e)
+        finally:
+            # The next write reopens the stream; utterances the server never
+            # closed end here.
+            if self.stream is stream:
+                self.stream = None
+                self._reader = None
+            for _ in range(self._utterances):
+                self._queue.put_nowait(vad_pb2.ServerFrame(end_of_utterance=True))
+            self._utterances = 0
+
+    async def write(self, pcm_bytes: bytes) -> None:
+        """Write a frame; its voiced PCM is delivered through ``segments()``."""
         await self._ensure_stream()
         logger.debug("[%s] VAD send %d bytes", self.flow_id, len(pcm_bytes))
         await self.stream.write(vad_pb2.ClientFrame(pcm=vad_pb2.Pcm(data=pcm_bytes)))
-        out = b""
+
+    async def segments(self) -> AsyncIterator[vad_pb2.ServerFrame]:
+        """Yield ``ServerFrame``s as soon as the server emits them, until ``close``."""
         while True:
-            try:
-                resp = await asyncio.wait_for(self.stream.read(), timeout=0)
-                out += resp.pcm.data
-            except asyncio.TimeoutError:
-                break
-        logger.debug("[%s] VAD recv %d bytes", self.flow_id, len(out))
-        return out
-
-    async def flush(self) -> bytes:
-        if not self.stream:
-            return b""
-        logger.info("[%s] VAD flush", self.flow_id)
-        await self.stream.write(vad_pb2.ClientFrame(flush=vad_pb2.Flush()))
-        await self.stream.done_writing()
-        out = b""
-        async for resp in self.stream:
-            out += resp.pcm.data
-        self.stream = None
-        logger.debug("[%s] VAD flush recv %d bytes", self.flow_id, len(out))
-        return out
+            frame = await self._queue.get()
+            if frame is None:
+                return
+            yield frame
+
+    async def end_utterance(self) -> None:
+        """Close the current utterance; ``segments()`` yields its ``end_of_utterance`` marker."""
+        if self.stream is None:
+            self._queue.put_nowait(vad_pb2.ServerFrame(end_of_utterance=True))
+            return
+        logger.info("[%s] VAD end of utterance", self.flow_id)
+        self._utterances += 1
+        await self.stream.write(vad_pb2.ClientFrame(end_of_utterance=vad_pb2.EndOfUtterance()))
+
+    async def end(self) -> None:
+        """Close the stream gracefully once its remaining frames are queued."""
+        if self.stream is None:
+            return
+        logger.info("[%s] VAD end", self.flow_id)
+        stream, reader = self.stream, self._reader
+        await stream.write(vad_pb2.ClientFrame(flush=vad_pb2.Flush()))
+        await stream.done_writing()
+        await reader
+
+    def close(self) -> None:
+        if self._reader is not None:
+            self._reader.cancel()
+        if self.stream is not None:
+            self.stream.cancel()
+        self.channel.close()
+        self._queue.put_nowait(None)
@@ -1,83 +1,323 @@
 import asyncio
 import logging
+from collections import deque
 from typing import Any, Dict
 
-from .modules import denoise_client, lid_client, asr_client, vad_client, compress_client
+from .modules import asr_client, stages
+from .modules.compress_client import FRAME_SAMPLES
+from .modules.language_cache import LanguageCache
+from .modules.outbox import Outbox
+from .modules.stage_queue import StageQueue
 
 logger = logging.getLogger(__name__)
 
 
-class Orchestrator:
-    """Main pipeline coordinating audio processing services."""
+def _packets(samples: int) -> int:
+    """Number of packets that cover ``samples``, the last one padded."""
+    return -(-samples // FRAME_SAMPLES)
+
+
+class _Flush:
+    """Queue marker that drains each stage in turn; the last one resolves ``done``."""
 
     def __init__(self) -> None:
+        self.done = asyncio.get_running_loop().create_future()
+
+
+class Orchestrator:
+    """Main pipeline coordinating audio processing services.
+
+    Each flow runs VAD, denoise and buffering (LID feed and encoding) as
+    separate tasks linked by bounded ``StageQueue``s, so the stages overlap
+    and ``feed_pcm`` only waits when the VAD queue is full.
+
+    Encoded packets are sent to ASR from the first voiced audio on, with the
+    end of each VAD segment marked once the segment is fully encoded. The
+    ASR stream opens with the cached language, if any; otherwise the
+    language follows once LID settles it. ASR results are forwarded to the
+    WebSocket while audio is still arriving. All of a flow's messages go through one
+    ``Outbox``, so they reach the client in order: an utterance's results
+    always precede its ``lid``, ``metrics`` and ``end`` events.
+    """
+
+    def __init__(self, stage_modes: Dict[str, str] | None = None) -> None:
         self.sessions: Dict[str, Dict[str, Any]] = {}
+        # Per-stage overrides of VAD_MODE, DENOISE_MODE, LID_MODE and COMPRESS_MODE.
+        self.stage_modes = stage_modes
+        # Shared across flows so reconnects with the same stream name hit it.
+        self.language_cache = LanguageCache()
 
     async def start_flow(self, flow_id: str, ws, params: dict) -> None:
         """Prepare session state for a new streaming flow."""
+        outbox = Outbox(flow_id, ws)
         self.sessions[flow_id] = {
             "ws": ws,
-            "compress": compress_client.CompressClient(),
-            "asr": asr_client.AsrClient(flow_id),
-            "lid": lid_client.LidClient(flow_id),
-            "vad": vad_client.VadClient(flow_id=flow_id),
-            "denoise": denoise_client.DenoiseClient(),
-            "buffer": bytearray(),
+            "outbox": outbox,
+            **stages.make_stages(flow_id, self.stage_modes),
+            "asr": asr_client.AsrClient(flow_id, outbox),
+            "packets": [],
+            # Samples fed to the encoder this utterance, padding included.
+            "encoded": 0,
+            # Finished VAD segments as (start_sample, end_sample, first_packet, end_packet).
+            "segments": [],
+            "seg_start": None,
+            # Packets and segment ends already sent to ASR.
+            "asr_sent": 0,
+            "asr_segments": 0,
+            "cache_key": params.get("stream") or flow_id,
+            # Flush markers still travelling through the stages.
+            "flushes": set(),
+            # Flush markers waiting for VAD to close their utterance.
+            "vad_flushes": deque(),
+            "closed": False,
         }
+        sess = self.sessions[flow_id]
+        # Raw PCM -> VAD -> frames -> denoise -> (frames, clean PCM) -> buffer.
+        queues = {name: StageQueue(name) for name in ("vad", "denoise", "buffer")}
+        sess["queues"] = queues
+        sess["tasks"] = [
+            asyncio.create_task(self._vad_write(flow_id, sess)),
+            asyncio.create_task(self._vad_read(flow_id, sess)),
+            asyncio.create_task(
+                self._stage(flow_id, "denoise", queues["denoise"], queues["buffer"],
+                            lambda frames: self._denoise(flow_id, sess, frames),
+                            lambda: self._denoise_tail(sess))
+            ),
+            asyncio.create_task(
+                self._stage(flow_id, "buffer", queues["buffer"], None,
+                            lambda item: self._buffer(flow_id, sess, *item),
+                            lambda: self._finish_packets(sess))
+            ),
+        ]
         logger.info("[%s] start", flow_id)
 
     async def feed_pcm(self, flow_id: str, pcm_bytes: bytes, ws) -> None:
-        """Process raw PCM: VAD -> Denoise -> LID (buffer only)."""
+        """Queue raw PCM for VAD -> Denoise -> LID (buffer only) -> Compress."""
         if flow_id not in self.sessions:
             logger.warning("[%s] feed on unknown session", flow_id)
             return
         sess = self.sessions[flow_id]
         logger.debug("[%s] recv %d bytes", flow_id, len(pcm_bytes))
-        vad_out = await sess["vad"].send(pcm_bytes)
+        await sess["queues"]["vad"].put(pcm_bytes)
+
+    async def _vad_write(self, flow_id: str, sess: Dict[str, Any]) -> None:
+        """Write raw PCM to VAD; a flush marker ends the utterance."""
+        vad = sess["vad"]
+        while True:
+            item = await sess["queues"]["vad"].get()
+            try:
+                if isinstance(item, _Flush):
+                    sess["vad_flushes"].append(item)
+                    await vad.end_utterance()
+                else:
+                    await vad.write(item)
+            except Exception:
+                logger.exception("[%s] vad stage error", flow_id)
+
+    async def _vad_read(self, flow_id: str, sess: Dict[str, Any]) -> None:
+        """Pass VAD frames on as they arrive, and each flush marker after its utterance."""
+        outbox = sess["queues"]["denoise"]
+        async for frame in sess["vad"].segments():
+            if frame.end_of_utterance:
+                await outbox.put(sess["vad_flushes"].popleft())
+            else:
+                await outbox.put([frame])
+
+    async def _stage(self, flow_id: str, name: str, inbox: StageQueue, outbox: StageQueue | None,
+                     handle, drain) -> None:
+        """Run one stage: ``handle`` each item, ``drain`` on a flush, pass results on."""
+        while True:
+            item = await inbox.get()
+            flush = isinstance(item, _Flush)
+            try:
+                out = await (drain() if flush else handle(item))
+            except Exception:
+                logger.exception("[%s] %s stage error", flow_id, name)
+                out = None
+            if outbox is not None:
+                if out:
+                    await outbox.put(out)
+                if flush:
+                    await outbox.put(item)
+            elif flush:
+                item.done.set_result(None)
+
+    async def _denoise(self, flow_id: str, sess: Dict[str, Any], frames: list) -> tuple:
+        vad_out = b"".join(f.pcm.data for f in frames)
         logger.debug("[%s] vad -> %d bytes", flow_id, len(vad_out))
-        if not vad_out:
-            return
-        pcm_clean = await sess["denoise"].send(vad_out)
+        pcm_clean = await sess["denoise"].send(vad_out) if vad_out else b""
+        if any(f.end_of_segment for f in frames):
+            # Release the filter's held-back samples with their segment.
+            pcm_clean += await sess["denoise"].flush()
         logger.debug("[%s] denoise -> %d bytes", flow_id, len(pcm_clean))
-        sess["lid"].feed(pcm_clean)
-        sess["buffer"].extend(pcm_clean)
-        logger.debug("[%s] buffer %d bytes", flow_id, len(sess["buffer"]))
+        return frames, pcm_clean
+
+    async def _denoise_tail(self, sess: Dict[str, Any]) -> tuple:
+        # The denoiser holds back its latency's worth of audio until flushed.
+        return [], await sess["denoise"].flush()
+
+    async def _finish_packets(self, sess: Dict[str, Any]) -> None:
+        sess["packets"].extend(await sess["compress"].finish())
+        # The encoder pads the partial frame into a last packet.
+        sess["encoded"] = _packets(sess["encoded"]) * FRAME_SAMPLES
+
+    async def _buffer(self, flow_id: str, sess: Dict[str, Any], frames: list, pcm_clean: bytes) -> None:
+        """LID-feed and encode denoised audio, noting where segments end."""
+        # Packet indices come from the samples encoded, not from the packets
+        # the encoder has returned so far, which may lag behind.
+        first_packet = sess["encoded"] // FRAME_SAMPLES
+        await self._forward_clean(flow_id, sess, pcm_clean)
+        # With VAD_PARTIAL the frame closing a segment may carry no audio.
+        for f in frames:
+            if sess["seg_start"] is None:
+                sess["seg_start"] = (f.start_sample, first_packet)
+            if f.end_of_segment:
+                start, seg_packet = sess["seg_start"]
+                sess["segments"].append((start, f.end_sample, seg_packet, _packets(sess["encoded"])))
+                sess["seg_start"] = None
+                logger.info(
+                    "[%s] segment [%.2f s, %.2f s) ready", flow_id, start / 16000, f.end_sample / 16000
+                )
+        if any(f.end_of_segment for f in frames):
+            # Encode the partial last frame so the segment's packets are complete.
+            await self._finish_packets(sess)
+        await self._stream_asr(flow_id, sess)
+
+    def _asr_language(self, sess: Dict[str, Any]) -> str | None:
+        """Return the utterance's language if it is known yet."""
+        if sess.get("cached_language"):
+            return sess["cached_language"]
+        lid = sess["lid"].result
+        if lid is not None and lid.final:
+            return lid.language
+        return None
+
+    async def _stream_asr(self, flow_id: str, sess: Dict[str, Any]) -> None:
+        """Send new packets and segment ends to ASR, opening it at the first packet."""
+        language = self._asr_language(sess)
+        if sess["asr"].stream is None:
+            if len(sess["packets"]) == 0:
+                return
+            await sess["asr"].start(language)
+        else:
+            await sess["asr"].set_language(language)
+        for start, end, _, end_packet in sess["segments"][sess["asr_segments"] :]:
+            if len(sess["packets"]) < end_packet:
+                # The segment's last packets are still with the encoder.
+                break
+            await self._send_packets(sess, end_packet)
+            await sess["asr"].end_segment()
+            sess["asr_segments"] += 1
+            logger.debug("[%s] segment [%d, %d) sent to ASR", flow_id, start, end)
+        await self._send_packets(sess, len(sess["packets"]))
+
+    async def _send_packets(self, sess: Dict[str, Any], end: int) -> None:
+        for pkt in sess["packets"][sess["asr_sent"] : end]:
+            await sess["asr"].send(pkt)
+        sess["asr_sent"] = max(sess["asr_sent"], end)
+
+    async def _forward_clean(self, flow_id: str, sess: Dict[str, Any], pcm_clean: bytes) -> None:
+        """Feed denoised audio to LID (unless cached) and the encoder."""
+        if not pcm_clean:
+            return
+        # Decide once per utterance, at its first voiced audio, whether
+        # the cached language stands in for LID (None: run LID).
+        if "cached_language" not in sess:
+            sess["cached_language"] = self.language_cache.lookup(sess["cache_key"])
+        # Encode first: a LID failure must not cost the segment its audio.
+        sess["packets"].extend(await sess["compress"].feed(pcm_clean))
+        sess["encoded"] += len(pcm_clean) // 2
+        if sess["cached_language"] is None:
+            try:
+                await sess["lid"].feed(pcm_clean)
+            except Exception:
+                logger.exception("[%s] LID feed error", flow_id)
+        logger.debug("[%s] packets %d", flow_id, len(sess["packets"]))
 
     async def flush(self, flow_id: str) -> None:
         """Flush remaining audio, detect language, and stream to ASR."""
         sess = self.sessions.get(flow_id)
         if not sess:
             return
-        logger.info("[%s] flush with %d buffered bytes", flow_id, len(sess["buffer"]))
-        vad_tail = await sess["vad"].flush()
-        logger.debug("[%s] vad tail %d bytes", flow_id, len(vad_tail))
-        if vad_tail:
-            pcm_clean = await sess["denoise"].send(vad_tail)
-            logger.debug("[%s] denoise tail -> %d bytes", flow_id, len(pcm_clean))
-            sess["lid"].feed(pcm_clean)
-            sess["buffer"].extend(pcm_clean)
-        language = await sess["lid"].flush()
-        logger.info("[%s] language %s", flow_id, language)
-        buffer = bytes(sess["buffer"])
-        packets = await sess["compress"].encode(buffer)
-        logger.debug("[%s] compress -> %d packets", flow_id, len(packets))
-        first = True
-        for pkt in packets:
-            logger.debug("[%s] send packet %d bytes", flow_id, len(pkt))
-            await sess["asr"].send(pkt, language if first else None)
-            first = False
+        try:
+            await self._flush(flow_id, sess)
+        except (asyncio.CancelledError, Exception):
+            # close_flow cancels the stages and clients under a running flush.
+            if not sess["closed"]:
+                raise
+            logger.info("[%s] flush abandoned, flow closed", flow_id)
+
+    async def _flush(self, flow_id: str, sess: Dict[str, Any]) -> None:
+        # Push a marker through the stages; once it has passed the last
+        # one, every stage has drained and the utterance is fully encoded.
+        marker = _Flush()
+        sess["flushes"].add(marker)
+        try:
+            await sess["queues"]["vad"].put(marker)
+            await marker.done
+        finally:
+            sess["flushes"].discard(marker)
+        logger.info("[%s] flush with %d encoded packets", flow_id, len(sess["packets"]))
+        language = sess.pop("cached_language", None)
+        cached = language is not None
+        if not cached:
+            try:
+                language = await sess["lid"].flush()
+            except Exception:
+                # Without a language the utterance still goes to ASR.
+                logger.exception("[%s] LID flush error", flow_id)
+            else:
+                self.language_cache.update(sess["cache_key"], language, sess["lid"].score)
+        logger.info("[%s] language %s%s", flow_id, language, " (cached)" if cached else "")
+        packets = sess["packets"]
+        logger.debug("[%s] compress -> %d packets, %d sent", flow_id, len(packets), sess["asr_sent"])
+        if sess["asr"].stream is None:
+            if packets:
+                await sess["asr"].start(language)
+        else:
+            await sess["asr"].set_language(language)
+        if sess["asr"].stream is not None:
+            await self._stream_asr(flow_id, sess)
+        # Returns once every result of the utterance is in the outbox, so
+        # they all reach the client before "end".
         await sess["asr"].flush()
+        outbox = sess["outbox"]
         if language:
-            await sess["ws"].write_message({"type": "lid", "flowId": flow_id, "language": language})
-        await sess["ws"].write_message({"type": "end", "flowId": flow_id})
-        sess["buffer"].clear()
+            outbox.put({"type": "lid", "flowId": flow_id, "language": language, "cached": cached})
+        outbox.put(
+            {
+                "type": "metrics",
+                "flowId": flow_id,
+                "lidCache": self.language_cache.stats(),
+                "queues": {name: q.stats() for name, q in sess["queues"].items()},
+            }
+        )
+        outbox.put({"type": "end", "flowId": flow_id})
+        packets.clear()
+        sess["encoded"] = 0
+        sess["asr_sent"] = 0
+        sess["asr_segments"] = 0
+        sess["segments"].clear()
+        sess["seg_start"] = None
+        await outbox.drain()
         logger.info("[%s] flush done", flow_id)
 
     def close_flow(self, flow_id: str) -> None:
         """Cleanup session state."""
         sess = self.sessions.pop(flow_id, None)
         if sess:
+            sess["closed"] = True
+            for task in sess["tasks"]:
+                task.cancel()
+            # The stages will not pass these on; wake the flushes awaiting them.
+            for marker in sess["flushes"]:
+                marker.done.cancel()
+            sess["outbox"].close()
+            logger.info(
+                "[%s] queues %s", flow_id, {name: q.stats() for name, q in sess["queues"].items()}
+            )
             sess["asr"].close()
+            sess["vad"].close()
             sess["lid"].close()
             sess["denoise"].close()
             sess["compress"].close()
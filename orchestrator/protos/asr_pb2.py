@@ -20,3 +20,15 @@ class OpusPacket:
 class ClientFrame:
     start: Start | None = None
     opus: OpusPacket | None = None
+    # The packets sent so far complete a VAD segment.
+    end_of_segment: bool = False
+    # The utterance's language, once known after ``start`` was sent without it.
+    language: str | None = None
+
+
+@dataclass
+class Result:
+    text: str
+    is_final: bool = False
+    start_ms: int = 0
+    end_ms: int = 0
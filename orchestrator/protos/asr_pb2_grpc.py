@@ -8,6 +8,9 @@ class _FakeStream:
     async def done_writing(self):
         pass
 
+    def cancel(self):
+        pass
+
     def __aiter__(self):
         return self
 
@@ -7,7 +7,11 @@ from opuslib import Encoder, APPLICATION_AUDIO
 
 
 class PcmToOpus:
-    """Incrementally encode PCM16 audio into Opus packets."""
+    """Incrementally encode PCM16 audio into Opus packets.
+
+    Samples that do not fill a whole frame are kept and prepended to the
+    next ``encode`` call; ``flush`` zero-pads and encodes whatever is left.
+    """
 
     def __init__(self, sr: int = 16000, frame_ms: int = 20, bitrate: int = 20000) -> None:
         self.sr = sr
@@ -16,11 +20,24 @@ class PcmToOpus:
         self.samples = sr * frame_ms // 1000
         self.enc = Encoder(sr, 1, APPLICATION_AUDIO)
         self.enc.bitrate = bitrate
+        self._pending = bytearray()
 
     def encode(self, pcm_bytes: bytes):
+        if self._pending:
+            self._pending.extend(pcm_bytes)
+            pcm_bytes = bytes(self._pending)
+            self._pending.clear()
         pcm = np.frombuffer(pcm_bytes, dtype=np.int16)
-        for i in range(0, len(pcm), self.samples):
-            frame = pcm[i : i + self.samples]
-            if len(frame) < self.samples:
-                break
-            yield self.enc.encode(frame.tobytes(), self.samples)
+        usable = len(pcm) - len(pcm) % self.samples
+        self._pending.extend(pcm[usable:].tobytes())
+        for i in range(0, usable, self.samples):
+            yield self.enc.encode(pcm[i : i + self.samples].tobytes(), self.samples)
+
+    def flush(self):
+        """Encode the buffered partial frame, padded with silence."""
+        if not self._pending:
+            return
+        self._pending.extend(bytes(self.samples * 2 - len(self._pending)))
+        pcm = bytes(self._pending)
+        self._pending.clear()
+        yield self.enc.encode(pcm, self.samples)
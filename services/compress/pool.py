@@ -0,0 +1,136 @@
+"""Bounded pool of Opus encoders shared by the Compress service."""
+
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# -------- 编码器池配置 --------
+COMPRESS_POOL_SIZE = int(os.environ.get("COMPRESS_POOL_SIZE", "64"))
+COMPRESS_POOL_IDLE_SEC = float(os.environ.get("COMPRESS_POOL_IDLE_SEC", "30"))
+
+
+class PoolExhausted(RuntimeError):
+    """Raised when every encoder in the pool is in use."""
+
+
+class _Entry:
+    __slots__ = ("encoder", "flow_id", "lock", "users", "last_used")
+
+    def __init__(self, encoder: Any, flow_id: Optional[str]) -> None:
+        self.encoder = encoder
+        self.flow_id = flow_id
+        self.lock = threading.Lock()
+        self.users = 0
+        self.last_used = time.monotonic()
+
+
+class EncoderPool:
+    """Hand out one encoder per flow from a bounded set.
+
+    An encoder stays bound to its flow between calls so Opus state carries
+    over from frame to frame. Bindings that have been idle for ``idle_sec``,
+    or the least recently used idle binding when the pool is full, are
+    returned to the free list; encoders are reset before they are reused.
+    Leases without a flow id get a private encoder for the duration of the
+    lease only (e.g. one ``EncodeStream`` call).
+    """
+
+    def __init__(
+        self,
+        factory: Callable[[], Any],
+        max_size: int = COMPRESS_POOL_SIZE,
+        idle_sec: float = COMPRESS_POOL_IDLE_SEC,
+    ) -> None:
+        self._factory = factory
+        self.max_size = max(1, max_size)
+        self.idle_sec = idle_sec
+        self._lock = threading.Lock()
+        self._bound: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._free: List[Any] = []
+        self._size = 0
+        self.created = 0
+        self.reused = 0
+        self.evicted = 0
+
+    @contextmanager
+    def lease(self, flow_id: Optional[str] = None) -> Iterator[Any]:
+        """Yield the encoder for ``flow_id``, serialising calls on the same flow."""
+        entry = self._acquire(flow_id)
+        entry.lock.acquire()
+        try:
+            yield entry.encoder
+        finally:
+            entry.lock.release()
+            self._release(entry)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "size": self._size,
+                "bound": len(self._bound),
+                "free": len(self._free),
+                "created": self.created,
+                "reused": self.reused,
+                "evicted": self.evicted,
+            }
+
+    def _acquire(self, flow_id: Optional[str]) -> _Entry:
+        with self._lock:
+            self._evict_idle(time.monotonic())
+            entry = self._bound.get(flow_id) if flow_id else None
+            if entry is None:
+                entry = _Entry(self._take_encoder(), flow_id)
+                if flow_id:
+                    self._bound[flow_id] = entry
+            else:
+                self._bound.move_to_end(flow_id)
+            entry.users += 1
+            return entry
+
+    def _release(self, entry: _Entry) -> None:
+        with self._lock:
+            entry.users -= 1
+            entry.last_used = time.monotonic()
+            if entry.flow_id is None:
+                self._free.append(entry.encoder)
+
+    def _take_encoder(self) -> Any:
+        """Return a clean encoder; caller holds ``self._lock``."""
+        if not self._free and self._size >= self.max_size:
+            self._evict_lru()
+        if self._free:
+            encoder = self._free.pop()
+            encoder.reset_state()
+            self.reused += 1
+            return encoder
+        self._size += 1
+        self.created += 1
+        return self._factory()
+
+    def _evict_lru(self) -> None:
+        for flow_id, entry in self._bound.items():
+            if entry.users == 0:
+                self._unbind(flow_id)
+                return
+        raise PoolExhausted(f"all {self.max_size} encoders are in use")
+
+    def _evict_idle(self, now: float) -> None:
+        expired = [
+            flow_id
+            for flow_id, entry in self._bound.items()
+            if entry.users == 0 and now - entry.last_used > self.idle_sec
+        ]
+        for flow_id in expired:
+            self._unbind(flow_id)
+
+    def _unbind(self, flow_id: str) -> None:
+        entry = self._bound.pop(flow_id)
+        self._free.append(entry.encoder)
+        self.evicted += 1
+        logger.debug("evict encoder of flow %s", flow_id)
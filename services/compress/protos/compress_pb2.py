@@ -24,7 +24,7 @@ _sym_db = _symbol_database.Default()
 
 
 
-DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x0e\x63ompress.proto\x12\x08\x63ompress\"\x13\n\x03PCM\x12\x0c\n\x04\x64\x61ta\x18\x01 \x01(\x0c\"\x14\n\x04Opus\x12\x0c\n\x04\x64\x61ta\x18\x01 \x01(\x0c\x32\x35\n\x08\x43ompress\x12)\n\x06\x45ncode\x12\r.compress.PCM\x1a\x0e.compress.Opus\"\x00\x62\x06proto3')
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x0e\x63ompress.proto\x12\x08\x63ompress\"$\n\x03PCM\x12\x0c\n\x04\x64\x61ta\x18\x01 \x01(\x0c\x12\x0f\n\x07\x66low_id\x18\x02 \x01(\t\"\x14\n\x04Opus\x12\x0c\n\x04\x64\x61ta\x18\x01 \x01(\x0c\x32j\n\x08\x43ompress\x12)\n\x06\x45ncode\x12\r.compress.PCM\x1a\x0e.compress.Opus\"\x00\x12\x33\n\x0c\x45ncodeStream\x12\r.compress.PCM\x1a\x0e.compress.Opus\"\x00(\x01\x30\x01\x62\x06proto3')
 
 _globals = globals()
 _builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, _globals)
@@ -32,9 +32,9 @@ _builder.BuildTopDescriptorsAndMessages(DESCRIPTOR, 'compress_pb2', _globals)
 if not _descriptor._USE_C_DESCRIPTORS:
   DESCRIPTOR._loaded_options = None
   _globals['_PCM']._serialized_start=28
-  _globals['_PCM']._serialized_end=47
-  _globals['_OPUS']._serialized_start=49
-  _globals['_OPUS']._serialized_end=69
-  _globals['_COMPRESS']._serialized_start=71
-  _globals['_COMPRESS']._serialized_end=124
+  _globals['_PCM']._serialized_end=64
+  _globals['_OPUS']._serialized_start=66
+  _globals['_OPUS']._serialized_end=86
+  _globals['_COMPRESS']._serialized_start=88
+  _globals['_COMPRESS']._serialized_end=194
 # @@protoc_insertion_point(module_scope)
@@ -39,6 +39,11 @@ class CompressStub(object):
                 request_serializer=compress__pb2.PCM.SerializeToString,
                 response_deserializer=compress__pb2.Opus.FromString,
                 _registered_method=True)
+        self.EncodeStream = channel.stream_stream(
+                '/compress.Compress/EncodeStream',
+                request_serializer=compress__pb2.PCM.SerializeToString,
+                response_deserializer=compress__pb2.Opus.FromString,
+                _registered_method=True)
 
 
 class CompressServicer(object):
@@ -50,6 +55,14 @@ class CompressServicer(object):
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def EncodeStream(self, request_iterator, context):
+        """Stream arbitrarily sized PCM chunks in; the server frames them into
+        20 ms frames and streams one Opus packet back per frame.
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
 
 def add_CompressServicer_to_server(servicer, server):
     rpc_method_handlers = {
@@ -58,6 +71,11 @@ def add_CompressServicer_to_server(servicer, server):
                     request_deserializer=compress__pb2.PCM.FromString,
                     response_serializer=compress__pb2.Opus.SerializeToString,
             ),
+            'EncodeStream': grpc.stream_stream_rpc_method_handler(
+                    servicer.EncodeStream,
+                    request_deserializer=compress__pb2.PCM.FromString,
+                    response_serializer=compress__pb2.Opus.SerializeToString,
+            ),
     }
     generic_handler = grpc.method_handlers_generic_handler(
             'compress.Compress', rpc_method_handlers)
@@ -95,3 +113,30 @@ class Compress(object):
             timeout,
             metadata,
             _registered_method=True)
+
+    @staticmethod
+    def EncodeStream(request_iterator,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.stream_stream(
+            request_iterator,
+            target,
+            '/compress.Compress/EncodeStream',
+            compress__pb2.PCM.SerializeToString,
+            compress__pb2.Opus.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
@@ -1,47 +1,140 @@
+import asyncio
 import logging
+import multiprocessing
+import os
+import signal
+import sys
 import grpc
-from concurrent import futures
 import numpy as np
 from opuslib import Encoder, APPLICATION_AUDIO
 
 from config import COMPRESS_PORT, configure_logging
 
+from .pool import COMPRESS_POOL_IDLE_SEC, COMPRESS_POOL_SIZE, EncoderPool, PoolExhausted
 from .protos import compress_pb2, compress_pb2_grpc
 
 logger = logging.getLogger(__name__)
 
+# -------- 服务进程配置 --------
+# Number of server processes sharing the port via SO_REUSEPORT. The kernel
+# spreads connections across them, so every flow (one channel each) stays
+# pinned to the worker, and encoder, that served its first call. Each worker
+# serves all its streams from one event loop, so an open stream holds no
+# thread.
+COMPRESS_WORKERS = int(os.environ.get("COMPRESS_WORKERS", "1"))
+
 
 class CompressServicer(compress_pb2_grpc.CompressServicer):
-    def __init__(self, sample_rate: int = 16000, frame_ms: int = 20, bitrate: int = 20000):
+    def __init__(
+        self,
+        sample_rate: int = 16000,
+        frame_ms: int = 20,
+        bitrate: int = 20000,
+        pool_size: int = COMPRESS_POOL_SIZE,
+        pool_idle_sec: float = COMPRESS_POOL_IDLE_SEC,
+    ):
+        self.sample_rate = sample_rate
+        self.bitrate = bitrate
         self.samples = sample_rate * frame_ms // 1000
-        self.encoder = Encoder(sample_rate, 1, APPLICATION_AUDIO)
-        self.encoder.bitrate = bitrate
+        self.pool = EncoderPool(self._make_encoder, pool_size, pool_idle_sec)
+
+    def _make_encoder(self) -> Encoder:
+        encoder = Encoder(self.sample_rate, 1, APPLICATION_AUDIO)
+        encoder.bitrate = self.bitrate
+        return encoder
 
-    def Encode(self, request: compress_pb2.PCM, context) -> compress_pb2.Opus:  # type: ignore
+    async def Encode(self, request: compress_pb2.PCM, context) -> compress_pb2.Opus:  # type: ignore
         try:
             logger.debug("recv %d bytes", len(request.data))
             pcm = np.frombuffer(request.data, dtype=np.int16)
             if len(pcm) < self.samples:
                 logger.debug("emit 0 bytes")
                 return compress_pb2.Opus(data=b"")
-            pkt = self.encoder.encode(pcm[: self.samples].tobytes(), self.samples)
+            with self.pool.lease(request.flow_id or None) as encoder:
+                pkt = encoder.encode(pcm[: self.samples].tobytes(), self.samples)
             logger.debug("emit %d bytes", len(pkt))
             return compress_pb2.Opus(data=pkt)
+        except PoolExhausted:
+            logger.warning("encoder pool exhausted %s", self.pool.stats())
+            context.set_code(grpc.StatusCode.RESOURCE_EXHAUSTED)
+            context.set_details("Compress encoder pool exhausted")
+            return compress_pb2.Opus(data=b"")
         except Exception:
             logger.exception("Compress encoding error")
             context.set_code(grpc.StatusCode.INTERNAL)
             context.set_details("Compress encoding error")
             return compress_pb2.Opus(data=b"")
 
+    async def EncodeStream(self, request_iterator, context):  # type: ignore[override]
+        """Frame streamed PCM into 20 ms frames and yield one packet per frame."""
+        frame_bytes = self.samples * 2
+        pending = bytearray()
+        requests = request_iterator.__aiter__()
+        try:
+            first = await requests.__anext__()
+        except StopAsyncIteration:
+            return
+        logger.debug("stream start flow_id=%s", first.flow_id)
+        try:
+            # Each stream gets a private encoder for its lifetime.
+            with self.pool.lease() as encoder:
+                async for request in _prepend(first, requests):
+                    logger.debug("stream recv %d bytes", len(request.data))
+                    pending.extend(request.data)
+                    usable = len(pending) - len(pending) % frame_bytes
+                    if not usable:
+                        continue
+                    pcm = np.frombuffer(pending, dtype=np.int16, count=usable // 2)
+                    for i in range(0, len(pcm), self.samples):
+                        pkt = encoder.encode(pcm[i : i + self.samples].tobytes(), self.samples)
+                        yield compress_pb2.Opus(data=pkt)
+                    del pcm
+                    del pending[:usable]
+            if pending:
+                logger.debug("stream drop %d trailing bytes", len(pending))
+        except PoolExhausted:
+            logger.warning("encoder pool exhausted %s", self.pool.stats())
+            await context.abort(grpc.StatusCode.RESOURCE_EXHAUSTED, "Compress encoder pool exhausted")
+        except Exception:
+            logger.exception("Compress stream encoding error")
+            await context.abort(grpc.StatusCode.INTERNAL, "Compress stream encoding error")
+
 
-def serve() -> None:
-    configure_logging()
-    server = grpc.server(futures.ThreadPoolExecutor(max_workers=2))
+async def _prepend(first, rest):
+    yield first
+    async for item in rest:
+        yield item
+
+
+async def _run_server(port: int) -> None:
+    """Run one server process; several may bind the same port."""
+    server = grpc.aio.server(options=[("grpc.so_reuseport", 1)])
     compress_pb2_grpc.add_CompressServicer_to_server(CompressServicer(), server)
-    server.add_insecure_port(f"[::]:{COMPRESS_PORT}")
-    logger.info("Compress gRPC service started (port=%s)", COMPRESS_PORT)
-    server.start()
-    server.wait_for_termination()
+    server.add_insecure_port(f"[::]:{port}")
+    await server.start()
+    logger.info("Compress gRPC service started (port=%s, pid=%s)", port, os.getpid())
+    await server.wait_for_termination()
+
+
+def _worker(port: int) -> None:
+    configure_logging()
+    asyncio.run(_run_server(port))
+
+
+def serve(workers: int = COMPRESS_WORKERS, port: int = COMPRESS_PORT) -> None:
+    configure_logging()
+    if workers <= 1:
+        _worker(port)
+        return
+    # No gRPC objects may exist in this process before the workers fork.
+    procs = [multiprocessing.Process(target=_worker, args=(port,), daemon=True) for _ in range(workers)]
+    for proc in procs:
+        proc.start()
+    # Exit cleanly on SIGTERM so the daemonic workers are terminated with us.
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    logger.info("Compress gRPC service started with %d workers (port=%s)", workers, port)
+    for proc in procs:
+        proc.join()
 
 
 if __name__ == "__main__":
@@ -24,7 +24,7 @@ _sym_db = _symbol_database.Default()
 
 
 
-DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\rdenoise.proto\x12\x07\x64\x65noise\")\n\x05\x41udio\x12\x0b\n\x03pcm\x18\x01 \x01(\x0c\x12\x13\n\x0bsample_rate\x18\x02 \x01(\x05\x32\x34\n\x07\x44\x65noise\x12)\n\x05\x43lean\x12\x0e.denoise.Audio\x1a\x0e.denoise.Audio\"\x00\x62\x06proto3')
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\rdenoise.proto\x12\x07\x64\x65noise\"8\n\x05\x41udio\x12\x0b\n\x03pcm\x18\x01 \x01(\x0c\x12\x13\n\x0bsample_rate\x18\x02 \x01(\x05\x12\r\n\x05\x66lush\x18\x03 \x01(\x08\x32i\n\x07\x44\x65noise\x12)\n\x05\x43lean\x12\x0e.denoise.Audio\x1a\x0e.denoise.Audio\"\x00\x12\x33\n\x0b\x43leanStream\x12\x0e.denoise.Audio\x1a\x0e.denoise.Audio\"\x00(\x01\x30\x01\x62\x06proto3')
 
 _globals = globals()
 _builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, _globals)
@@ -32,7 +32,7 @@ _builder.BuildTopDescriptorsAndMessages(DESCRIPTOR, 'denoise_pb2', _globals)
 if not _descriptor._USE_C_DESCRIPTORS:
   DESCRIPTOR._loaded_options = None
   _globals['_AUDIO']._serialized_start=26
-  _globals['_AUDIO']._serialized_end=67
-  _globals['_DENOISE']._serialized_start=69
-  _globals['_DENOISE']._serialized_end=121
+  _globals['_AUDIO']._serialized_end=82
+  _globals['_DENOISE']._serialized_start=84
+  _globals['_DENOISE']._serialized_end=189
 # @@protoc_insertion_point(module_scope)
@@ -39,6 +39,11 @@ class DenoiseStub(object):
                 request_serializer=denoise__pb2.Audio.SerializeToString,
                 response_deserializer=denoise__pb2.Audio.FromString,
                 _registered_method=True)
+        self.CleanStream = channel.stream_stream(
+                '/denoise.Denoise/CleanStream',
+                request_serializer=denoise__pb2.Audio.SerializeToString,
+                response_deserializer=denoise__pb2.Audio.FromString,
+                _registered_method=True)
 
 
 class DenoiseServicer(object):
@@ -50,6 +55,15 @@ class DenoiseServicer(object):
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def CleanStream(self, request_iterator, context):
+        """Denoise a flow's audio with state kept across messages. Every request
+        gets one response holding the samples completed so far; a request with
+        flush set is answered with the held-back tail, also with flush set.
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
 
 def add_DenoiseServicer_to_server(servicer, server):
     rpc_method_handlers = {
@@ -58,6 +72,11 @@ def add_DenoiseServicer_to_server(servicer, server):
                     request_deserializer=denoise__pb2.Audio.FromString,
                     response_serializer=denoise__pb2.Audio.SerializeToString,
             ),
+            'CleanStream': grpc.stream_stream_rpc_method_handler(
+                    servicer.CleanStream,
+                    request_deserializer=denoise__pb2.Audio.FromString,
+                    response_serializer=denoise__pb2.Audio.SerializeToString,
+            ),
     }
     generic_handler = grpc.method_handlers_generic_handler(
             'denoise.Denoise', rpc_method_handlers)
@@ -95,3 +114,30 @@ class Denoise(object):
             timeout,
             metadata,
             _registered_method=True)
+
+    @staticmethod
+    def CleanStream(request_iterator,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.stream_stream(
+            request_iterator,
+            target,
+            '/denoise.Denoise/CleanStream',
+            denoise__pb2.Audio.SerializeToString,
+            denoise__pb2.Audio.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
@@ -1,22 +1,28 @@
+import asyncio
 import logging
 import grpc
-from concurrent import futures
 
 from config import DENOISE_PORT, configure_logging
 
 from .protos import denoise_pb2, denoise_pb2_grpc
+from .spectral import SpectralDenoiser
 
 logger = logging.getLogger(__name__)
 
-
 class DenoiseServicer(denoise_pb2_grpc.DenoiseServicer):
-    """Trivial denoise service that echoes input audio."""
+    """Spectral-subtraction denoising, per call or per stream.
+
+    Served from one event loop, so an open ``CleanStream`` holds no thread.
+    """
 
-    def Clean(self, request: denoise_pb2.Audio, context):  # type: ignore[override]
+    async def Clean(self, request: denoise_pb2.Audio, context):  # type: ignore[override]
         try:
             pcm_in = request.pcm
             logger.debug("recv %d bytes", len(pcm_in))
-            resp = denoise_pb2.Audio(pcm=pcm_in, sample_rate=request.sample_rate)
+            # A unary call has no history, so filter and drain in one go.
+            den = SpectralDenoiser(sr=request.sample_rate or 16000)
+            pcm_out = den.process_pcm16(pcm_in) + den.flush_pcm16()
+            resp = denoise_pb2.Audio(pcm=pcm_out, sample_rate=request.sample_rate)
             logger.debug("emit %d bytes", len(resp.pcm))
             return resp
         except Exception:
@@ -25,16 +31,36 @@ class DenoiseServicer(denoise_pb2_grpc.DenoiseServicer):
             context.set_details("Denoise clean error")
             return denoise_pb2.Audio(pcm=b"", sample_rate=request.sample_rate)
 
+    async def CleanStream(self, request_iterator, context):  # type: ignore[override]
+        den = None
+        try:
+            async for request in request_iterator:
+                if den is None:
+                    den = SpectralDenoiser(sr=request.sample_rate or 16000)
+                    logger.info("stream start sr=%d latency=%d samples", request.sample_rate, den.latency)
+                pcm_out = den.process_pcm16(request.pcm) if request.pcm else b""
+                if request.flush:
+                    pcm_out += den.flush_pcm16()
+                logger.debug("recv %d bytes, emit %d bytes flush=%s", len(request.pcm), len(pcm_out), request.flush)
+                yield denoise_pb2.Audio(pcm=pcm_out, sample_rate=request.sample_rate, flush=request.flush)
+        except asyncio.CancelledError:
+            logger.info("stream cancelled by client")
+            raise
+        except Exception:
+            logger.exception("Denoise stream error")
+            await context.abort(grpc.StatusCode.INTERNAL, "Denoise stream error")
+        logger.info("stream end")
+
 
-def serve() -> None:
+async def serve() -> None:
     configure_logging()
-    server = grpc.server(futures.ThreadPoolExecutor(max_workers=2))
+    server = grpc.aio.server()
     denoise_pb2_grpc.add_DenoiseServicer_to_server(DenoiseServicer(), server)
     server.add_insecure_port(f"[::]:{DENOISE_PORT}")
+    await server.start()
     logger.info("Denoise gRPC service started (port=%s)", DENOISE_PORT)
-    server.start()
-    server.wait_for_termination()
+    await server.wait_for_termination()
 
 
 if __name__ == "__main__":
-    serve()
+    asyncio.run(serve())
@@ -0,0 +1,161 @@
+"""Streaming STFT spectral-subtraction denoiser."""
+
+import os
+from typing import Optional
+
+import numpy as np
+from numpy.lib.stride_tricks import as_strided
+
+# -------- 降噪配置 --------
+DENOISE_SR = int(os.environ.get("DENOISE_SR", "16000"))
+# Analysis frame; frames overlap by half, so the added latency is half a frame.
+DENOISE_FRAME_MS = int(os.environ.get("DENOISE_FRAME_MS", "32"))
+# Noise power is over-subtracted by this factor ...
+DENOISE_OVERSUB = float(os.environ.get("DENOISE_OVERSUB", "2.0"))
+# ... but no bin is attenuated by more than this (dB, negative).
+DENOISE_FLOOR_DB = float(os.environ.get("DENOISE_FLOOR_DB", "-15"))
+# How fast the noise estimate may rise, in dB per second.
+DENOISE_NOISE_RISE_DB = float(os.environ.get("DENOISE_NOISE_RISE_DB", "3"))
+
+# Recursive smoothing of the frame power before minimum tracking, and the
+# number of frames per closed-form block (keeps the powers in range).
+_SMOOTHING = 0.8
+_SMOOTH_BLOCK = 32
+
+
+class SpectralDenoiser:
+    """Stateful spectral subtraction with weighted overlap-add.
+
+    Audio is cut into frames of ``frame_ms`` with 50% overlap and a
+    square-root Hann window on both analysis and synthesis, which
+    reconstructs the input exactly when no bin is attenuated. All frames
+    available in a call are transformed, filtered and overlap-added as one
+    batch. The overlap tail, pending input and the per-bin noise estimate
+    carry over from call to call.
+
+    The noise estimate tracks the per-bin minimum of the recursively
+    smoothed frame power. It may rise by at most ``noise_rise_db`` per
+    second, and drops immediately when quieter frames appear. Each bin is scaled by
+    ``sqrt(max(1 - oversub * noise / power, floor^2))``.
+
+    Output is the input delayed by exactly half a frame. Samples are held
+    back until their frames are complete, so the first ``latency`` samples
+    of a stream come out on a later call. ``flush`` drains them, after which
+    exactly as many samples have come out as went in, each aligned with its
+    input sample.
+    """
+
+    def __init__(
+        self,
+        sr: int = DENOISE_SR,
+        frame_ms: int = DENOISE_FRAME_MS,
+        oversub: float = DENOISE_OVERSUB,
+        floor_db: float = DENOISE_FLOOR_DB,
+        noise_rise_db: float = DENOISE_NOISE_RISE_DB,
+    ) -> None:
+        self.hop = sr * frame_ms // 1000 // 2
+        self.frame = 2 * self.hop
+        self.latency = self.frame - self.hop
+        n = np.arange(self.frame)
+        self.window = np.sqrt(0.5 - 0.5 * np.cos(2 * np.pi * n / self.frame)).astype(np.float32)
+        self.oversub = oversub
+        self.min_gain2 = 10.0 ** (floor_db / 10.0)
+        self.rise = 10.0 ** (noise_rise_db * self.hop / sr / 10.0)  # per frame
+        self.noise: Optional[np.ndarray] = None
+        self._smoothed: Optional[np.ndarray] = None
+        k = np.arange(_SMOOTH_BLOCK, dtype=np.float64)[:, None]
+        self._up = _SMOOTHING ** -k
+        self._down = _SMOOTHING**k
+        self._rise_k = self.rise**k
+        self._clear()
+
+    def _clear(self) -> None:
+        # Pending input starts with the latency's worth of priming zeros, so
+        # the first frame ends half a frame into the stream.
+        self._in = np.zeros(self.latency, dtype=np.float32)
+        self._tail = np.zeros(self.frame - self.hop, dtype=np.float32)
+        self._skip = self.latency
+        self._pending = 0  # input samples not yet returned
+
+    def reset(self) -> None:
+        """Forget buffered audio and the noise estimate."""
+        self.noise = None
+        self._smoothed = None
+        self._clear()
+
+    def process(self, x: np.ndarray) -> np.ndarray:
+        """Filter float32 samples; returns the samples that are complete."""
+        self._pending += x.size
+        buf = np.concatenate((self._in, x.astype(np.float32, copy=False)))
+        n = (buf.size - self.frame) // self.hop + 1 if buf.size >= self.frame else 0
+        if n == 0:
+            self._in = buf
+            return np.empty(0, dtype=np.float32)
+        frames = as_strided(buf, shape=(n, self.frame), strides=(buf.strides[0] * self.hop, buf.strides[0]))
+        spec = np.fft.rfft(frames * self.window, axis=1)
+        power = spec.real**2 + spec.imag**2
+        noise = self._track_noise(power)
+        gain2 = np.maximum(1.0 - self.oversub * noise / np.maximum(power, 1e-12), self.min_gain2)
+        spec *= np.sqrt(gain2)
+        y = np.fft.irfft(spec, n=self.frame, axis=1).astype(np.float32) * self.window
+        # 50% overlap: each hop of output is this frame's head plus the
+        # previous frame's tail.
+        out = y[:, : self.hop].copy()
+        out[0] += self._tail
+        out[1:] += y[:-1, self.hop :]
+        self._tail = y[-1, self.hop :].copy()
+        self._in = buf[n * self.hop :].copy()
+        out = out.reshape(-1)
+        if self._skip:
+            drop = min(self._skip, out.size)
+            out = out[drop:]
+            self._skip -= drop
+        self._pending -= out.size
+        return out
+
+    def flush(self) -> np.ndarray:
+        """Return the held-back samples and start a new utterance; the noise estimate is kept."""
+        remaining = self._pending
+        # The zero padding must not drag the noise estimate down.
+        noise, smoothed = self.noise, self._smoothed
+        out = self.process(np.zeros(self.frame, dtype=np.float32))[:remaining]
+        self.noise, self._smoothed = noise, smoothed
+        self._clear()
+        return out
+
+    def _track_noise(self, power: np.ndarray) -> np.ndarray:
+        """Return the noise estimate for every frame of ``power``.
+
+        Per frame, ``s[k] = a * s[k-1] + (1 - a) * p[k]`` and
+        ``noise[k] = min(rise * noise[k-1], s[k])``. Both recursions are
+        evaluated in closed form on blocks of frames, so there is no Python
+        loop per frame, and the result does not depend on how the audio
+        was chunked.
+        """
+        a = _SMOOTHING
+        prev = power[0] if self._smoothed is None else self._smoothed
+        noise = np.inf if self.noise is None else self.noise
+        out = np.empty_like(power)
+        for b in range(0, power.shape[0], _SMOOTH_BLOCK):
+            block = power[b : b + _SMOOTH_BLOCK]
+            n = block.shape[0]
+            # s[k] = a**(k+1) * s[-1] + (1 - a) * a**k * cumsum(a**-j * p[j])
+            smoothed = self._down[:n] * (a * prev + (1 - a) * np.cumsum(self._up[:n] * block, axis=0))
+            prev = smoothed[-1]
+            # noise[k] = rise**k * min(rise * noise[-1], min_j<=k(s[j] / rise**j))
+            scaled = np.minimum.accumulate(smoothed / self._rise_k[:n], axis=0)
+            out[b : b + n] = self._rise_k[:n] * np.minimum(noise * self.rise, scaled)
+            noise = out[b + n - 1]
+        self._smoothed = prev
+        self.noise = noise
+        return out
+
+    def process_pcm16(self, pcm: bytes) -> bytes:
+        return _to_pcm16(self.process(np.frombuffer(pcm, dtype=np.int16) * np.float32(1.0 / 32768.0)))
+
+    def flush_pcm16(self) -> bytes:
+        return _to_pcm16(self.flush())
+
+
+def _to_pcm16(y: np.ndarray) -> bytes:
+    return np.clip(np.round(y * 32768.0), -32768, 32767).astype(np.int16).tobytes()
@@ -0,0 +1,163 @@
+"""Language identification backends selectable with ``LID_BACKEND``."""
+
+import logging
+import os
+from pathlib import Path
+from typing import List, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+MODEL_ROOT = Path(__file__).resolve().parents[2] / "models"
+
+# -------- 后端配置 --------
+# "speechbrain": ECAPA on CommonLanguage (PyTorch); "whisper": multilingual
+# Whisper language detection through sherpa-onnx (ONNX Runtime).
+LID_BACKEND = os.environ.get("LID_BACKEND", "speechbrain")
+LID_WHISPER_ENCODER = os.environ.get(
+    "LID_WHISPER_ENCODER", str(MODEL_ROOT / "lid-whisper" / "tiny-encoder.int8.onnx")
+)
+LID_WHISPER_DECODER = os.environ.get(
+    "LID_WHISPER_DECODER", str(MODEL_ROOT / "lid-whisper" / "tiny-decoder.int8.onnx")
+)
+LID_NUM_THREADS = int(os.environ.get("LID_NUM_THREADS", "1"))
+
+# Whisper language codes mapped to the CommonLanguage labels the SpeechBrain
+# model returns, so either backend yields the same names downstream. Codes
+# without a CommonLanguage counterpart are passed through unchanged.
+WHISPER_TO_COMMONLANGUAGE = {
+    "ar": "Arabic",
+    "eu": "Basque",
+    "br": "Breton",
+    "ca": "Catalan",
+    "zh": "Chinese_China",
+    "yue": "Chinese_Hongkong",
+    "cs": "Czech",
+    "nl": "Dutch",
+    "en": "English",
+    "et": "Estonian",
+    "fr": "French",
+    "ka": "Georgian",
+    "de": "German",
+    "el": "Greek",
+    "id": "Indonesian",
+    "it": "Italian",
+    "ja": "Japanese",
+    "lv": "Latvian",
+    "mt": "Maltese",
+    "mn": "Mangolian",
+    "fa": "Persian",
+    "pl": "Polish",
+    "pt": "Portuguese",
+    "ro": "Romanian",
+    "ru": "Russian",
+    "sl": "Slovenian",
+    "es": "Spanish",
+    "sv": "Swedish",
+    "ta": "Tamil",
+    "tt": "Tatar",
+    "tr": "Turkish",
+    "uk": "Ukranian",
+    "cy": "Welsh",
+}
+
+Item = Tuple[bytes, int]
+
+# Score of a backend that reports no confidence; counts as not confident.
+NO_SCORE = 0.0
+
+
+def pcm16_to_float32(pcm: bytes) -> np.ndarray:
+    """View PCM16 bytes in place and convert them once to float32 in [-1, 1)."""
+    samples = np.frombuffer(pcm, dtype=np.int16).astype(np.float32)
+    samples *= 1.0 / 32768.0
+    return samples
+
+
+class SpeechBrainBackend:
+    """SpeechBrain ``lang-id-commonlanguage_ecapa``; scores are cosine similarities."""
+
+    name = "speechbrain"
+
+    def __init__(self, savedir: Path = MODEL_ROOT / "lid") -> None:
+        import torch
+        from speechbrain.inference.classifiers import EncoderClassifier
+
+        self.torch = torch
+        self.model = EncoderClassifier.from_hparams(
+            source="speechbrain/lang-id-commonlanguage_ecapa", savedir=str(savedir)
+        )
+
+    def _tensor(self, pcm: bytes, sample_rate: int):
+        # The tensor shares the float32 buffer; nothing else is copied.
+        wav = self.torch.from_numpy(pcm16_to_float32(pcm))
+        if sample_rate != 16000:
+            wav = self.model.audio_normalizer(wav, sample_rate)
+        return wav
+
+    def classify(self, pcm: bytes, sample_rate: int = 16000) -> Tuple[str, float]:
+        batch = self._tensor(pcm, sample_rate).unsqueeze(0)
+        out_prob, score, index, language = self.model.classify_batch(batch, self.torch.ones(1))
+        return language[0], float(score[0])
+
+    def classify_batch(self, items: List[Item]) -> List[Tuple[str, float]]:
+        """Classify several utterances in one forward pass, zero-padded to the longest."""
+        wavs = [self._tensor(pcm, sr) for pcm, sr in items]
+        longest = max(w.shape[0] for w in wavs)
+        batch = self.torch.zeros(len(wavs), longest)
+        for i, w in enumerate(wavs):
+            batch[i, : w.shape[0]] = w
+        lens = self.torch.tensor([w.shape[0] / longest for w in wavs])
+        out_prob, score, index, language = self.model.classify_batch(batch, lens)
+        return [(language[i], float(score[i])) for i in range(len(wavs))]
+
+
+class WhisperBackend:
+    """Whisper language detection with sherpa-onnx.
+
+    Whisper picks the most likely language token and sherpa-onnx returns
+    only that code, without its probability. Results therefore carry
+    ``NO_SCORE``, which is below every confidence threshold: streams run to
+    their end or ``LID_STREAM_MAX_MS`` and the language cache never fills.
+    """
+
+    name = "whisper"
+
+    def __init__(
+        self,
+        encoder: str = LID_WHISPER_ENCODER,
+        decoder: str = LID_WHISPER_DECODER,
+        num_threads: int = LID_NUM_THREADS,
+    ) -> None:
+        import sherpa_onnx
+
+        for path in (encoder, decoder):
+            if not Path(path).is_file():
+                raise FileNotFoundError(f"Whisper LID model not found: {path}")
+        cfg = sherpa_onnx.SpokenLanguageIdentificationConfig(
+            whisper=sherpa_onnx.SpokenLanguageIdentificationWhisperConfig(encoder=encoder, decoder=decoder),
+            num_threads=num_threads,
+        )
+        self.slid = sherpa_onnx.SpokenLanguageIdentification(cfg)
+
+    def classify(self, pcm: bytes, sample_rate: int = 16000) -> Tuple[str, float]:
+        stream = self.slid.create_stream()
+        stream.accept_waveform(sample_rate, pcm16_to_float32(pcm))
+        code = self.slid.compute(stream)
+        return WHISPER_TO_COMMONLANGUAGE.get(code, code), NO_SCORE
+
+    def classify_batch(self, items: List[Item]) -> List[Tuple[str, float]]:
+        # sherpa-onnx runs one utterance per call.
+        return [self.classify(pcm, sr) for pcm, sr in items]
+
+
+BACKENDS = {"speechbrain": SpeechBrainBackend, "whisper": WhisperBackend}
+
+
+def make_backend(name: str = LID_BACKEND):
+    """Load the backend called ``name``."""
+    if name not in BACKENDS:
+        raise ValueError(f"unknown LID backend: {name}")
+    logger.info("loading LID backend %s", name)
+    return BACKENDS[name]()
@@ -0,0 +1,107 @@
+"""Micro-batching of LID requests."""
+
+import asyncio
+import logging
+import os
+import time
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from .executor import InferenceExecutor
+
+logger = logging.getLogger(__name__)
+
+# -------- 批处理配置 --------
+# Opt-in: a wait of 0 (the default) disables batching and each request runs
+# on its own. A positive wait adds up to that much latency to every request,
+# so enable it only where tests/bench_lid.py --load shows batching winning.
+LID_BATCH_WAIT_MS = float(os.environ.get("LID_BATCH_WAIT_MS", "0"))
+LID_BATCH_MAX = int(os.environ.get("LID_BATCH_MAX", "8"))
+# Requests in one forward pass differ in length by at most this factor.
+LID_BATCH_PAD_RATIO = float(os.environ.get("LID_BATCH_PAD_RATIO", "2.0"))
+
+Item = Tuple[bytes, int]
+
+
+class LidBatcher:
+    """Group ``Detect`` requests arriving close together into batched passes.
+
+    Requests submitted within ``wait_ms`` of the first pending one, up to
+    ``max_batch`` of them, are collected, sorted by length and split into
+    buckets whose longest member is at most ``pad_ratio`` times the
+    shortest, so padding stays bounded. Each bucket is one call of
+    ``classify`` on the executor, which returns one result per item.
+    """
+
+    def __init__(
+        self,
+        classify: Callable[[List[Item]], List[Tuple[str, float]]],
+        executor: InferenceExecutor,
+        wait_ms: float = LID_BATCH_WAIT_MS,
+        max_batch: int = LID_BATCH_MAX,
+        pad_ratio: float = LID_BATCH_PAD_RATIO,
+    ) -> None:
+        self.classify = classify
+        self.executor = executor
+        self.wait = wait_ms / 1000.0
+        self.max_batch = max(1, max_batch)
+        self.pad_ratio = pad_ratio
+        self._pending: List[Tuple[Item, asyncio.Future, float]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: Set[asyncio.Task] = set()
+        self.batches = 0
+        self.requests = 0
+
+    async def detect(self, pcm: bytes, sample_rate: int) -> Tuple[str, float, float]:
+        """Classify one utterance; returns label, score and seconds spent queued."""
+        loop = asyncio.get_running_loop()
+        fut = loop.create_future()
+        self._pending.append(((pcm, sample_rate), fut, time.monotonic()))
+        if len(self._pending) >= self.max_batch:
+            self._dispatch()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.wait, self._dispatch)
+        return await fut
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "batches": self.batches,
+            "requests": self.requests,
+            "avg_batch": self.requests / self.batches if self.batches else 0.0,
+        }
+
+    def _dispatch(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        pending, self._pending = self._pending, []
+        pending.sort(key=lambda p: len(p[0][0]))
+        for bucket in self._buckets(pending):
+            self.batches += 1
+            self.requests += len(bucket)
+            task = asyncio.ensure_future(self._run(bucket))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    def _buckets(self, pending: list) -> List[list]:
+        buckets: List[list] = []
+        for p in pending:
+            if buckets and len(p[0][0]) <= len(buckets[-1][0][0][0]) * self.pad_ratio:
+                buckets[-1].append(p)
+            else:
+                buckets.append([p])
+        return buckets
+
+    async def _run(self, bucket: list) -> None:
+        items = [item for item, _, _ in bucket]
+        started = time.monotonic()
+        try:
+            results, wait = await self.executor.run(self.classify, items)
+        except Exception as e:
+            for _, fut, _ in bucket:
+                if not fut.done():
+                    fut.set_exception(e)
+            return
+        logger.debug("batch of %d ran in %.1f ms", len(items), (time.monotonic() - started) * 1000)
+        for (_, fut, queued), (language, score) in zip(bucket, results):
+            if not fut.done():
+                fut.set_result((language, score, started - queued + wait))
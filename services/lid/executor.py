@@ -0,0 +1,94 @@
+"""Bounded executor running LID inference off the event loop."""
+
+import asyncio
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Tuple
+
+logger = logging.getLogger(__name__)
+
+# -------- 推理执行配置 --------
+# "thread" shares the model loaded by the server; "process" loads one copy
+# per worker process.
+LID_EXECUTOR = os.environ.get("LID_EXECUTOR", "thread")
+LID_WORKERS = int(os.environ.get("LID_WORKERS", "1"))
+# Requests allowed to wait for a worker; more are rejected.
+LID_MAX_QUEUE = int(os.environ.get("LID_MAX_QUEUE", "32"))
+
+
+class QueueFull(RuntimeError):
+    """Raised when the wait queue already holds ``max_queue`` requests."""
+
+
+class InferenceExecutor:
+    """Run blocking inference on a thread or process pool.
+
+    At most ``workers`` calls run at once; up to ``max_queue`` more wait for
+    a free worker and anything beyond that is rejected with ``QueueFull``
+    instead of piling up behind a long utterance.
+    """
+
+    def __init__(
+        self,
+        kind: str = LID_EXECUTOR,
+        workers: int = LID_WORKERS,
+        max_queue: int = LID_MAX_QUEUE,
+    ) -> None:
+        self.workers = max(1, workers)
+        self.max_queue = max_queue
+        self.executor = _make_executor(kind, self.workers)
+        self._sem = asyncio.Semaphore(self.workers)
+        self.running = 0
+        self.waiting = 0
+        self.completed = 0
+        self.rejected = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Tuple[Any, float]:
+        """Run ``fn(*args)`` on a worker; returns the result and seconds spent waiting."""
+        if self.waiting >= self.max_queue and self._sem.locked():
+            self.rejected += 1
+            raise QueueFull(f"{self.waiting} LID requests already waiting")
+        t0 = time.monotonic()
+        self.waiting += 1
+        try:
+            await self._sem.acquire()
+        finally:
+            self.waiting -= 1
+        wait = time.monotonic() - t0
+        self.wait_total += wait
+        self.wait_max = max(self.wait_max, wait)
+        self.running += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.executor, fn, *args), wait
+        finally:
+            self.running -= 1
+            self.completed += 1
+            self._sem.release()
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "running": self.running,
+            "waiting": self.waiting,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "avg_wait_ms": self.wait_total / self.completed * 1000 if self.completed else 0.0,
+            "max_wait_ms": self.wait_max * 1000,
+        }
+
+    def close(self) -> None:
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _make_executor(kind: str, workers: int) -> Executor:
+    if kind == "thread":
+        return ThreadPoolExecutor(max_workers=workers, thread_name_prefix="lid")
+    if kind == "process":
+        # Spawned workers import the server module and load their own model.
+        return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+    raise ValueError(f"unknown LID executor: {kind}")
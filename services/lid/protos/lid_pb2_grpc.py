@@ -5,10 +5,8 @@ import warnings
 
 from . import lid_pb2 as lid__pb2
 
-GRPC_GENERATED_VERSION = '1.63.0'
+GRPC_GENERATED_VERSION = '1.74.0'
 GRPC_VERSION = grpc.__version__
-EXPECTED_ERROR_RELEASE = '1.65.0'
-SCHEDULED_RELEASE_DATE = 'June 25, 2024'
 _version_not_supported = False
 
 try:
@@ -18,15 +16,12 @@ except ImportError:
     _version_not_supported = True
 
 if _version_not_supported:
-    warnings.warn(
+    raise RuntimeError(
         f'The grpc package installed is at version {GRPC_VERSION},'
         + f' but the generated code in lid_pb2_grpc.py depends on'
         + f' grpcio>={GRPC_GENERATED_VERSION}.'
         + f' Please upgrade your grpc module to grpcio>={GRPC_GENERATED_VERSION}'
         + f' or downgrade your generated code using grpcio-tools<={GRPC_VERSION}.'
-        + f' This warning will become an error in {EXPECTED_ERROR_RELEASE},'
-        + f' scheduled for release on {SCHEDULED_RELEASE_DATE}.',
-        RuntimeWarning
     )
 
 
@@ -44,6 +39,11 @@ class LIDStub(object):
                 request_serializer=lid__pb2.LIDRequest.SerializeToString,
                 response_deserializer=lid__pb2.LIDResponse.FromString,
                 _registered_method=True)
+        self.StreamDetect = channel.stream_stream(
+                '/lid.LID/StreamDetect',
+                request_serializer=lid__pb2.LIDChunk.SerializeToString,
+                response_deserializer=lid__pb2.LIDResponse.FromString,
+                _registered_method=True)
 
 
 class LIDServicer(object):
@@ -56,6 +56,15 @@ class LIDServicer(object):
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def StreamDetect(self, request_iterator, context):
+        """Detect language incrementally while audio is streamed in. Interim
+        results are returned as the window grows; the stream ends with one
+        result marked final, possibly before the client has sent all audio.
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
 
 def add_LIDServicer_to_server(servicer, server):
     rpc_method_handlers = {
@@ -64,10 +73,16 @@ def add_LIDServicer_to_server(servicer, server):
                     request_deserializer=lid__pb2.LIDRequest.FromString,
                     response_serializer=lid__pb2.LIDResponse.SerializeToString,
             ),
+            'StreamDetect': grpc.stream_stream_rpc_method_handler(
+                    servicer.StreamDetect,
+                    request_deserializer=lid__pb2.LIDChunk.FromString,
+                    response_serializer=lid__pb2.LIDResponse.SerializeToString,
+            ),
     }
     generic_handler = grpc.method_handlers_generic_handler(
             'lid.LID', rpc_method_handlers)
     server.add_generic_rpc_handlers((generic_handler,))
+    server.add_registered_method_handlers('lid.LID', rpc_method_handlers)
 
 
  # This class is part of an EXPERIMENTAL API.
@@ -100,3 +115,30 @@ class LID(object):
             timeout,
             metadata,
             _registered_method=True)
+
+    @staticmethod
+    def StreamDetect(request_iterator,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.stream_stream(
+            request_iterator,
+            target,
+            '/lid.LID/StreamDetect',
+            lid__pb2.LIDChunk.SerializeToString,
+            lid__pb2.LIDResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
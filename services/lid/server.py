@@ -1,63 +1,125 @@
-"""Minimal gRPC LID service using SpeechBrain."""
+"""Minimal gRPC LID service with a pluggable backend."""
 import asyncio
-import io
 import logging
 import os
-import tempfile
-import wave
-from pathlib import Path
 
 import grpc
-from speechbrain.inference.classifiers import EncoderClassifier
 
 from config import LID_PORT, configure_logging
 
+from .backends import make_backend
+from .batch import LID_BATCH_WAIT_MS, LidBatcher
+from .executor import InferenceExecutor, QueueFull
 from .protos import lid_pb2, lid_pb2_grpc
 
-# Persist model weights under repository's models directory
-MODEL_DIR = Path(__file__).resolve().parents[2] / "models" / "lid"
-
-# Load model at module import so it can be shared across requests.
-lid_model = EncoderClassifier.from_hparams(
-    source="speechbrain/lang-id-commonlanguage_ecapa", savedir=str(MODEL_DIR)
-)
+# Load the backend selected by LID_BACKEND at module import so it can be
+# shared across requests; process executor workers load their own.
+backend = make_backend()
 
 logger = logging.getLogger(__name__)
 
+# -------- 流式识别配置 --------
+# StreamDetect classifies the audio received so far once LID_STREAM_MIN_MS
+# is in and again every LID_STREAM_STEP_MS, and finishes as soon as a score
+# reaches LID_EARLY_EXIT_SCORE or the window reaches LID_STREAM_MAX_MS.
+LID_STREAM_MIN_MS = int(os.environ.get("LID_STREAM_MIN_MS", "1500"))
+LID_STREAM_STEP_MS = int(os.environ.get("LID_STREAM_STEP_MS", "1000"))
+LID_STREAM_MAX_MS = int(os.environ.get("LID_STREAM_MAX_MS", "10000"))
+LID_EARLY_EXIT_SCORE = float(os.environ.get("LID_EARLY_EXIT_SCORE", "0.8"))
+
+
+def classify_pcm(pcm: bytes, sample_rate: int = 16000) -> tuple[str, float]:
+    """Classify one utterance held in memory; returns (label, score)."""
+    return backend.classify(pcm, sample_rate)
 
-def pcm_to_wav_bytes(pcm: bytes, sample_rate: int) -> bytes:
-    """Wrap raw PCM bytes into a WAV container."""
-    with io.BytesIO() as buf:
-        with wave.open(buf, "wb") as wf:
-            wf.setnchannels(1)
-            wf.setsampwidth(2)  # 16-bit
-            wf.setframerate(sample_rate)
-            wf.writeframes(pcm)
-        return buf.getvalue()
+
+def classify_pcm_batch(items: list[tuple[bytes, int]]) -> list[tuple[str, float]]:
+    """Classify several utterances in one backend call."""
+    return backend.classify_batch(items)
 
 
 class LIDServicer(lid_pb2_grpc.LIDServicer):
+    def __init__(self, executor: InferenceExecutor | None = None, batcher: LidBatcher | None = None) -> None:
+        self.executor = executor or InferenceExecutor()
+        self.batcher = batcher
+
+    async def _classify(self, pcm: bytes, sample_rate: int) -> tuple[str, float, float]:
+        if self.batcher is not None:
+            return await self.batcher.detect(pcm, sample_rate)
+        (language, score), wait = await self.executor.run(classify_pcm, pcm, sample_rate)
+        return language, score, wait
+
     async def Detect(self, request: lid_pb2.LIDRequest, context) -> lid_pb2.LIDResponse:
         logger.debug("recv %d bytes", len(request.pcm))
-        wav_bytes = pcm_to_wav_bytes(request.pcm, request.sample_rate or 16000)
-        with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as f:
-            f.write(wav_bytes)
-            tmp_path = f.name
+        if not request.pcm:
+            await context.abort(grpc.StatusCode.INVALID_ARGUMENT, "empty audio")
+        depth = self.executor.waiting
+        sample_rate = request.sample_rate or 16000
         try:
-            out_prob, score, index, language = lid_model.classify_file(tmp_path)
-            logger.debug("emit label=%s score=%.4f", language[0], float(score))
-            return lid_pb2.LIDResponse(language=language[0], score=float(score))
+            language, score, wait = await self._classify(request.pcm, sample_rate)
+            logger.debug("emit label=%s score=%.4f waited %.1f ms", language, score, wait * 1000)
+            context.set_trailing_metadata(
+                (("lid-queue-depth", str(depth)), ("lid-wait-ms", f"{wait * 1000:.1f}"))
+            )
+            return lid_pb2.LIDResponse(language=language, score=score)
+        except QueueFull as e:
+            logger.warning("LID request rejected: %s, %s", e, self.executor.stats())
+            await context.abort(grpc.StatusCode.RESOURCE_EXHAUSTED, str(e))
         except Exception:
             logger.exception("LID detection error")
             await context.abort(grpc.StatusCode.INTERNAL, "LID detection error")
-        finally:
-            os.remove(tmp_path)
+
+    async def StreamDetect(self, request_iterator, context):
+        buf = bytearray()
+        sample_rate = 0
+        next_at = 0
+        classified = 0
+        best: tuple[str, float] | None = None
+        try:
+            async for chunk in request_iterator:
+                if not sample_rate:
+                    sample_rate = chunk.sample_rate or 16000
+                    bytes_per_ms = sample_rate * 2 // 1000
+                    next_at = LID_STREAM_MIN_MS * bytes_per_ms
+                    max_bytes = LID_STREAM_MAX_MS * bytes_per_ms
+                buf.extend(chunk.pcm[: max_bytes - len(buf)])
+                if chunk.end:
+                    break
+                if len(buf) < min(next_at, max_bytes):
+                    continue
+                next_at = len(buf) + LID_STREAM_STEP_MS * bytes_per_ms
+                try:
+                    language, score, _ = await self._classify(bytes(buf), sample_rate)
+                except QueueFull:
+                    logger.debug("interim LID step skipped, queue full")
+                    continue
+                best, classified = (language, score), len(buf)
+                done = score >= LID_EARLY_EXIT_SCORE or len(buf) >= max_bytes
+                logger.debug("stream %d bytes label=%s score=%.4f final=%s", len(buf), language, score, done)
+                yield lid_pb2.LIDResponse(language=language, score=score, final=done)
+                if done:
+                    return
+            if not buf:
+                return
+            if best is None or len(buf) > classified:
+                language, score, _ = await self._classify(bytes(buf), sample_rate)
+                best = (language, score)
+            logger.debug("stream end %d bytes label=%s score=%.4f", len(buf), *best)
+            yield lid_pb2.LIDResponse(language=best[0], score=best[1], final=True)
+        except QueueFull as e:
+            logger.warning("LID stream rejected: %s, %s", e, self.executor.stats())
+            await context.abort(grpc.StatusCode.RESOURCE_EXHAUSTED, str(e))
+        except Exception:
+            logger.exception("LID stream error")
+            await context.abort(grpc.StatusCode.INTERNAL, "LID stream error")
 
 
 async def serve() -> None:
     configure_logging()
     server = grpc.aio.server()
-    lid_pb2_grpc.add_LIDServicer_to_server(LIDServicer(), server)
+    executor = InferenceExecutor()
+    batcher = LidBatcher(classify_pcm_batch, executor) if LID_BATCH_WAIT_MS > 0 else None
+    lid_pb2_grpc.add_LIDServicer_to_server(LIDServicer(executor, batcher), server)
     server.add_insecure_port(f"[::]:{LID_PORT}")
     await server.start()
     logger.info("LID gRPC server started on %s", LID_PORT)
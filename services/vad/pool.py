@@ -0,0 +1,79 @@
+"""Pool of ready-to-use VAD sessions for the VAD service."""
+
+import logging
+import os
+import time
+from collections import deque
+from typing import Callable, Dict
+
+from .vad import VadSession, make_vad_session
+
+logger = logging.getLogger(__name__)
+
+# -------- 会话池配置 --------
+VAD_POOL_SIZE = int(os.environ.get("VAD_POOL_SIZE", "16"))
+VAD_POOL_PREWARM = int(os.environ.get("VAD_POOL_PREWARM", "4"))
+VAD_POOL_IDLE_SEC = float(os.environ.get("VAD_POOL_IDLE_SEC", "300"))
+
+
+class VadSessionPool:
+    """Keep up to ``max_size`` idle sessions so streams skip model loading.
+
+    Sessions are reset when released. Idle sessions beyond ``prewarm`` are
+    dropped once they have been unused for ``idle_sec``. Meant to be used
+    from a single event loop thread.
+    """
+
+    def __init__(
+        self,
+        factory: Callable[[], VadSession] = make_vad_session,
+        max_size: int = VAD_POOL_SIZE,
+        prewarm: int = VAD_POOL_PREWARM,
+        idle_sec: float = VAD_POOL_IDLE_SEC,
+    ) -> None:
+        self._factory = factory
+        self.max_size = max_size
+        self.min_size = min(prewarm, max_size)
+        self.idle_sec = idle_sec
+        self._idle: deque = deque()  # (session, released_at), most recent last
+        self.hits = 0
+        self.misses = 0
+        self.evicted = 0
+
+    def prewarm(self) -> None:
+        """Create sessions until ``min_size`` are idle."""
+        while len(self._idle) < self.min_size:
+            self._idle.append((self._factory(), time.monotonic()))
+        logger.info("VAD pool prewarmed with %d sessions", len(self._idle))
+
+    def acquire(self) -> VadSession:
+        self._evict_idle(time.monotonic())
+        if self._idle:
+            self.hits += 1
+            return self._idle.pop()[0]
+        self.misses += 1
+        return self._factory()
+
+    def release(self, sess: VadSession) -> None:
+        try:
+            sess.reset()
+        except Exception:
+            logger.exception("VAD session reset failed; dropping it")
+            return
+        if len(self._idle) < self.max_size:
+            self._idle.append((sess, time.monotonic()))
+        else:
+            self.evicted += 1
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "idle": len(self._idle),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evicted": self.evicted,
+        }
+
+    def _evict_idle(self, now: float) -> None:
+        while len(self._idle) > self.min_size and now - self._idle[0][1] > self.idle_sec:
+            self._idle.popleft()
+            self.evicted += 1
@@ -24,7 +24,7 @@ _sym_db = _symbol_database.Default()
 
 
 
-DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\tvad.proto\x12\x03vad\"-\n\x05Start\x12\x0f\n\x07\x66low_id\x18\x01 \x01(\t\x12\x13\n\x0bsample_rate\x18\x02 \x01(\x05\"\x13\n\x03Pcm\x12\x0c\n\x04\x64\x61ta\x18\x01 \x01(\x0c\"\x07\n\x05\x46lush\"g\n\x0b\x43lientFrame\x12\x1b\n\x05start\x18\x01 \x01(\x0b\x32\n.vad.StartH\x00\x12\x17\n\x03pcm\x18\x02 \x01(\x0b\x32\x08.vad.PcmH\x00\x12\x1b\n\x05\x66lush\x18\x03 \x01(\x0b\x32\n.vad.FlushH\x00\x42\x05\n\x03msg\"$\n\x0bServerFrame\x12\x15\n\x03pcm\x18\x01 \x01(\x0b\x32\x08.vad.Pcm2A\n\rVoiceActivity\x12\x30\n\x06Stream\x12\x10.vad.ClientFrame\x1a\x10.vad.ServerFrame(\x01\x30\x01\x62\x06proto3')
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\tvad.proto\x12\x03vad\"-\n\x05Start\x12\x0f\n\x07\x66low_id\x18\x01 \x01(\t\x12\x13\n\x0bsample_rate\x18\x02 \x01(\x05\"\x13\n\x03Pcm\x12\x0c\n\x04\x64\x61ta\x18\x01 \x01(\x0c\"\x07\n\x05\x46lush\"\x10\n\x0e\x45ndOfUtterance\"\x98\x01\n\x0b\x43lientFrame\x12\x1b\n\x05start\x18\x01 \x01(\x0b\x32\n.vad.StartH\x00\x12\x17\n\x03pcm\x18\x02 \x01(\x0b\x32\x08.vad.PcmH\x00\x12\x1b\n\x05\x66lush\x18\x03 \x01(\x0b\x32\n.vad.FlushH\x00\x12/\n\x10\x65nd_of_utterance\x18\x04 \x01(\x0b\x32\x13.vad.EndOfUtteranceH\x00\x42\x05\n\x03msg\"\x80\x01\n\x0bServerFrame\x12\x15\n\x03pcm\x18\x01 \x01(\x0b\x32\x08.vad.Pcm\x12\x14\n\x0cstart_sample\x18\x02 \x01(\x03\x12\x12\n\nend_sample\x18\x03 \x01(\x03\x12\x16\n\x0e\x65nd_of_segment\x18\x04 \x01(\x08\x12\x18\n\x10\x65nd_of_utterance\x18\x05 \x01(\x08\x32\x41\n\rVoiceActivity\x12\x30\n\x06Stream\x12\x10.vad.ClientFrame\x1a\x10.vad.ServerFrame(\x01\x30\x01\x62\x06proto3')
 
 _globals = globals()
 _builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, _globals)
@@ -37,10 +37,12 @@ if not _descriptor._USE_C_DESCRIPTORS:
   _globals['_PCM']._serialized_end=84
   _globals['_FLUSH']._serialized_start=86
   _globals['_FLUSH']._serialized_end=93
-  _globals['_CLIENTFRAME']._serialized_start=95
-  _globals['_CLIENTFRAME']._serialized_end=198
-  _globals['_SERVERFRAME']._serialized_start=200
-  _globals['_SERVERFRAME']._serialized_end=236
-  _globals['_VOICEACTIVITY']._serialized_start=238
-  _globals['_VOICEACTIVITY']._serialized_end=303
+  _globals['_ENDOFUTTERANCE']._serialized_start=95
+  _globals['_ENDOFUTTERANCE']._serialized_end=111
+  _globals['_CLIENTFRAME']._serialized_start=114
+  _globals['_CLIENTFRAME']._serialized_end=266
+  _globals['_SERVERFRAME']._serialized_start=269
+  _globals['_SERVERFRAME']._serialized_end=397
+  _globals['_VOICEACTIVITY']._serialized_start=399
+  _globals['_VOICEACTIVITY']._serialized_end=464
 # @@protoc_insertion_point(module_scope)
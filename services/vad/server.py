@@ -8,14 +8,29 @@ import grpc
 
 from config import VAD_PORT, configure_logging
 
-from .vad import make_vad_session, pcm16_bytes_to_float32
+from .pool import VadSessionPool
+from .vad import VadSegment
 from .protos import vad_pb2, vad_pb2_grpc
 
 logger = logging.getLogger(__name__)
 
+
+def _segment_frame(seg: VadSegment) -> vad_pb2.ServerFrame:
+    logger.debug("emit %d bytes [%d, %d) eos=%s", len(seg.pcm), seg.start, seg.end, seg.end_of_segment)
+    return vad_pb2.ServerFrame(
+        pcm=vad_pb2.Pcm(data=seg.pcm),
+        start_sample=seg.start,
+        end_sample=seg.end,
+        end_of_segment=seg.end_of_segment,
+    )
+
+
 class VadServicer(vad_pb2_grpc.VoiceActivityServicer):
+    def __init__(self, pool: VadSessionPool | None = None) -> None:
+        self.pool = pool or VadSessionPool()
+
     async def Stream(self, request_iterator, context):
-        sess = make_vad_session()
+        sess = self.pool.acquire()
         try:
             async for frame in request_iterator:
                 if frame.HasField("start"):
@@ -24,29 +39,34 @@ class VadServicer(vad_pb2_grpc.VoiceActivityServicer):
                 elif frame.HasField("pcm"):
                     pcm_bytes = frame.pcm.data
                     logger.debug("recv %d bytes", len(pcm_bytes))
-                    sess.accept_f32(pcm16_bytes_to_float32(pcm_bytes))
-                    out = sess.pop_pcm()
-                    if out:
-                        logger.debug("emit %d bytes", len(out))
-                        yield vad_pb2.ServerFrame(pcm=vad_pb2.Pcm(data=out))
+                    sess.accept_pcm16(pcm_bytes)
+                    for seg in sess.pop_segments():
+                        yield _segment_frame(seg)
+                elif frame.HasField("end_of_utterance"):
+                    logger.info("end of utterance")
+                    for seg in sess.end_utterance():
+                        yield _segment_frame(seg)
+                    yield vad_pb2.ServerFrame(end_of_utterance=True)
                 elif frame.HasField("flush"):
                     logger.info("stream flush")
-                    out = sess.flush_pcm()
-                    if out:
-                        logger.debug("emit %d bytes", len(out))
-                        yield vad_pb2.ServerFrame(pcm=vad_pb2.Pcm(data=out))
+                    for seg in sess.flush_segments():
+                        yield _segment_frame(seg)
                     break
         except Exception:
             logger.exception("VAD stream error")
             await context.abort(grpc.StatusCode.INTERNAL, "VAD stream error")
         finally:
-            logger.info("stream end")
+            chunks = sess.stats()
+            self.pool.release(sess)
+            logger.info("stream end, chunks %s, pool %s", chunks, self.pool.stats())
 
 
 async def serve() -> None:
     configure_logging()
     server = grpc.aio.server()
-    vad_pb2_grpc.add_VoiceActivityServicer_to_server(VadServicer(), server)
+    pool = VadSessionPool()
+    pool.prewarm()
+    vad_pb2_grpc.add_VoiceActivityServicer_to_server(VadServicer(pool), server)
     server.add_insecure_port(f"[::]:{VAD_PORT}")
     await server.start()
     logger.info("VAD gRPC server listening on %s", VAD_PORT)
@@ -2,7 +2,7 @@ import os
 import io
 from collections import deque
 from pathlib import Path
-from typing import List, Optional
+from typing import List, NamedTuple, Optional, Tuple
 
 import numpy as np
 import soundfile as sf
@@ -15,6 +15,16 @@ VAD_CHUNK_MS = int(os.environ.get("VAD_CHUNK_MS", "20"))
 VAD_THRESHOLD = float(os.environ.get("VAD_THRESHOLD", "0.48"))
 VAD_PAD_START_MS = int(os.environ.get("VAD_PAD_START_MS", "100"))
 VAD_PAD_END_MS = int(os.environ.get("VAD_PAD_END_MS", "80"))
+VAD_RING_SEC = float(os.environ.get("VAD_RING_SEC", "10"))
+# Emit open-segment audio as it arrives instead of once the segment ends.
+VAD_PARTIAL = os.environ.get("VAD_PARTIAL", "0") == "1"
+# Split segments longer than this at their quietest chunk; 0 disables.
+VAD_MAX_SEGMENT_MS = int(os.environ.get("VAD_MAX_SEGMENT_MS", "0"))
+# Chunks whose RMS is below this level (dBFS) are taken as silence without
+# running the model; "-inf" disables the gate.
+VAD_ENERGY_FLOOR_DB = float(os.environ.get("VAD_ENERGY_FLOOR_DB", "-60"))
+# Reset the model state after this much gated audio.
+VAD_ENERGY_RESET_MS = int(os.environ.get("VAD_ENERGY_RESET_MS", "300"))
 
 
 def _default_model_path() -> str:
@@ -22,12 +32,13 @@ def _default_model_path() -> str:
     return os.environ.get("VAD_MODEL", str(base))
 
 
-def pcm16_bytes_to_float32(pcm: bytes) -> np.ndarray:
-    """Convert PCM16 bytes to float32 numpy array."""
-    if not pcm:
-        return np.empty((0,), dtype=np.float32)
-    arr = np.frombuffer(pcm, dtype=np.int16).astype(np.float32) / 32768.0
-    return np.ascontiguousarray(arr)
+class VadSegment(NamedTuple):
+    """Voiced audio with its sample offsets in the stream (end exclusive)."""
+
+    start: int
+    end: int
+    pcm: bytes
+    end_of_segment: bool
 
 
 def make_vad_session(
@@ -38,6 +49,11 @@ def make_vad_session(
     threshold: float = VAD_THRESHOLD,
     pad_start_ms: int = VAD_PAD_START_MS,
     pad_end_ms: int = VAD_PAD_END_MS,
+    ring_sec: float = VAD_RING_SEC,
+    partial: bool = VAD_PARTIAL,
+    max_segment_ms: int = VAD_MAX_SEGMENT_MS,
+    energy_floor_db: float = VAD_ENERGY_FLOOR_DB,
+    energy_reset_ms: int = VAD_ENERGY_RESET_MS,
 ):
     """Create a VAD session based on sherpa-onnx."""
     model_path = model_path or _default_model_path()
@@ -55,13 +71,61 @@ def make_vad_session(
             cfg.model = model_path
         except Exception:
             pass
-    return VadSession(cfg, sr, buffer_sec, chunk_ms, pad_start_ms, pad_end_ms)
+    return VadSession(
+        cfg,
+        sr,
+        buffer_sec,
+        chunk_ms,
+        pad_start_ms,
+        pad_end_ms,
+        ring_sec,
+        partial,
+        max_segment_ms,
+        energy_floor_db,
+        energy_reset_ms,
+    )
 
 
 class VadSession:
-    """Wrap sherpa-onnx voice activity detection."""
+    """Wrap sherpa-onnx voice activity detection.
+
+    Incoming PCM16 is written once, as int16, into a preallocated ring buffer
+    holding ``ring_sec`` seconds; only the model input is converted to
+    float32, and segments are returned byte-exact from the ring. Pre-roll,
+    in-segment and tail chunks are tracked as absolute sample positions into
+    that ring, so per chunk only the VAD decision is made; samples are copied
+    out again only when segments are popped, or spilled early when a segment
+    outgrows the ring.
+
+    With ``partial`` set, the audio of an open segment is handed out after
+    every accepted block as pieces with ``end_of_segment=False``; the piece
+    closing the segment may then be empty. ``max_segment_ms`` caps segment
+    length: a segment reaching it is closed in the quietest chunk of its
+    not-yet-emitted second half and a new one continues from there.
+
+    Outside a segment, chunks whose RMS is below ``energy_floor_db`` are
+    classified as silence without calling the model; they still enter the
+    pre-roll. Inside a segment every chunk is evaluated, so short pauses and
+    the hangover are decided by the model exactly as without the gate. After
+    ``energy_reset_ms`` of gated audio the model state is reset, so the next
+    evaluated chunk starts clean rather than from the context it had before
+    the silence.
+    """
 
-    def __init__(self, cfg, sr, buffer_sec, chunk_ms, pad_start_ms, pad_end_ms):
+    def __init__(
+        self,
+        cfg,
+        sr,
+        buffer_sec,
+        chunk_ms,
+        pad_start_ms,
+        pad_end_ms,
+        ring_sec=VAD_RING_SEC,
+        partial=VAD_PARTIAL,
+        max_segment_ms=VAD_MAX_SEGMENT_MS,
+        energy_floor_db=VAD_ENERGY_FLOOR_DB,
+        energy_reset_ms=VAD_ENERGY_RESET_MS,
+    ):
         self.vad = sherpa_onnx.VoiceActivityDetector(
             cfg, buffer_size_in_seconds=buffer_sec
         )
@@ -70,11 +134,41 @@ class VadSession:
         self.chunk_samples = int(sr * chunk_ms / 1000.0)
         self.pad_start_frames = max(0, int(pad_start_ms // chunk_ms))
         self.pad_end_frames = max(0, int(pad_end_ms // chunk_ms))
-        self._pre = deque(maxlen=self.pad_start_frames)
+        self.partial = bool(partial)
+        self.max_segment_samples = int(sr * max_segment_ms / 1000.0) if max_segment_ms > 0 else 0
+        # Mean-square threshold on samples scaled to [-1, 1).
+        self.energy_floor = 10.0 ** (energy_floor_db / 10.0)
+        self.energy_reset_chunks = max(1, int(energy_reset_ms // chunk_ms))
+        # Ring capacity is a whole number of chunks and at least two seconds.
+        chunks = max(int(sr * max(ring_sec, 2.0)) // self.chunk_samples, 2)
+        self._ring = np.zeros(chunks * self.chunk_samples, dtype=np.int16)
+        self._pre: deque = deque(maxlen=self.pad_start_frames)  # pre-roll chunk starts
+        self._clear()
+
+    def _clear(self) -> None:
+        self._pos = 0  # absolute number of samples written
+        self._pre.clear()
         self._in_seg = False
-        self._cur: List[np.ndarray] = []
-        self._final: List[np.ndarray] = []
+        self._seg_origin = 0  # where the open segment began
+        self._seg_start = 0  # first sample of it not yet handed out
+        self._seg_end = 0
+        # (start, end, end_of_segment) ranges still in the ring, and pieces
+        # already copied out of it, in stream order.
+        self._final: List[Tuple[int, int, bool]] = []
+        self._spilled: List[Tuple[int, int, bool, np.ndarray]] = []
         self._tail_left = 0
+        self._last_end = 0  # end of the last closed segment
+        self._gated_run = 0
+        self.evaluated_chunks = 0
+        self.skipped_chunks = 0
+
+    def stats(self) -> dict:
+        return {"evaluated_chunks": self.evaluated_chunks, "skipped_chunks": self.skipped_chunks}
+
+    def reset(self) -> None:
+        """Discard all audio and model state so the session can be reused."""
+        self.vad.reset()
+        self._clear()
 
     def _drain(self):
         try:
@@ -84,56 +178,192 @@ class VadSession:
         except Exception:
             pass
 
+    def _write(self, samples: np.ndarray) -> None:
+        """Copy ``samples`` into the ring, keeping pending segments intact."""
+        cap = self._ring.size
+        overwrite = self._pos + samples.size - cap
+        if overwrite > 0:
+            if self._final and self._final[0][0] < overwrite:
+                self._spill()
+            if self._in_seg and self._seg_start < overwrite:
+                # Hand the overlong open segment over and continue it afresh.
+                self._final.append((self._seg_start, self._seg_end, False))
+                self._spill()
+                self._seg_start = self._seg_end
+        idx = self._pos % cap
+        n = samples.size
+        if idx + n <= cap:
+            self._ring[idx : idx + n] = samples
+        else:
+            first = cap - idx
+            self._ring[idx:] = samples[:first]
+            self._ring[: n - first] = samples[first:]
+        self._pos += n
+
+    def _read(self, start: int, end: int, out: np.ndarray) -> None:
+        cap = self._ring.size
+        idx = start % cap
+        first = min(end - start, cap - idx)
+        out[:first] = self._ring[idx : idx + first]
+        out[first : end - start] = self._ring[: end - start - first]
+
+    def _spill(self) -> None:
+        """Copy pending final segments out of the ring before it wraps over them."""
+        for s, e, eos in self._final:
+            out = np.empty(e - s, dtype=np.int16)
+            self._read(s, e, out)
+            self._spilled.append((s, e, eos, out))
+        self._final = []
+
+    def accept_pcm16(self, pcm: bytes):
+        """Accept PCM16 bytes; the bytes are viewed, not converted, for storage."""
+        if not pcm:
+            return
+        samples = np.frombuffer(pcm, dtype=np.int16)
+        half = self._ring.size // 2
+        if samples.size <= half:
+            self._accept_block(samples)
+        else:
+            # Feed at most half a ring at a time so a chunk's pre-roll is
+            # never overwritten before the chunk has been classified.
+            for off in range(0, samples.size, half):
+                self._accept_block(samples[off : off + half])
+        self._drain()
+
     def accept_f32(self, samples: np.ndarray):
+        """Accept float32 samples in [-1, 1); prefer ``accept_pcm16`` for PCM input."""
         if samples.size == 0:
             return
-        for i in range(0, samples.size, self.chunk_samples):
-            c = samples[i : i + self.chunk_samples]
-            if c.size == 0:
-                break
+        pcm = np.clip(np.round(samples * 32768.0), -32768, 32767).astype(np.int16)
+        self.accept_pcm16(pcm.tobytes())
+
+    def _accept_block(self, samples: np.ndarray) -> None:
+        base = self._pos
+        self._write(samples)
+        # The model is the only consumer of float32, so convert just once here.
+        model_in = samples.astype(np.float32)
+        model_in *= 1.0 / 32768.0
+        gated = self._gate(model_in)
+        # sherpa-onnx keeps its own streaming model state, so the decision
+        # still has to be taken chunk by chunk; no samples are copied here.
+        for k, i in enumerate(range(0, samples.size, self.chunk_samples)):
+            c = model_in[i : i + self.chunk_samples]
+            start = base + i
+            end = start + c.size
             if self.pad_start_frames:
-                self._pre.append(c.copy())
-            self.vad.accept_waveform(c)
-            speech = bool(self.vad.is_speech_detected())
+                self._pre.append(start)
+            if gated is not None and gated[k] and not self._in_seg:
+                speech = False
+                self.skipped_chunks += 1
+                self._gated_run += 1
+                if self._gated_run == self.energy_reset_chunks:
+                    self.vad.reset()
+            else:
+                self.vad.accept_waveform(c)
+                speech = bool(self.vad.is_speech_detected())
+                self.evaluated_chunks += 1
+                self._gated_run = 0
 
             if not self._in_seg and speech:
-                if self._pre:
-                    self._cur.extend(list(self._pre))
-                else:
-                    self._cur.append(c)
+                # Pre-roll never reaches back into the previous segment.
+                pre = max(self._pre[0], self._last_end) if self._pre else start
+                self._seg_origin = self._seg_start = pre
+                self._seg_end = end
                 self._in_seg = True
                 self._tail_left = self.pad_end_frames
             elif self._in_seg and speech:
-                self._cur.append(c)
+                self._seg_end = end
                 self._tail_left = self.pad_end_frames
             elif self._in_seg and (not speech):
                 if self._tail_left > 0:
-                    self._cur.append(c)
+                    self._seg_end = end
                     self._tail_left -= 1
                 else:
-                    self._final.append(np.concatenate(self._cur, axis=0))
-                    self._cur = []
+                    self._final.append((self._seg_start, self._seg_end, True))
+                    self._last_end = self._seg_end
                     self._in_seg = False
+            if (
+                self._in_seg
+                and self.max_segment_samples
+                and self._seg_end - self._seg_origin >= self.max_segment_samples
+            ):
+                self._split()
+
+        if self.partial and self._in_seg and self._seg_end > self._seg_start:
+            self._final.append((self._seg_start, self._seg_end, False))
+            self._seg_start = self._seg_end
+
+    def _gate(self, x: np.ndarray) -> Optional[np.ndarray]:
+        """Flag the chunks of ``x`` whose mean square is below the energy floor."""
+        if self.energy_floor <= 0.0:
+            return None
+        n, rem = divmod(x.size, self.chunk_samples)
+        full = x[: n * self.chunk_samples].reshape(n, self.chunk_samples)
+        power = np.einsum("ij,ij->i", full, full) / self.chunk_samples
+        if rem:
+            tail = x[n * self.chunk_samples :]
+            power = np.append(power, np.dot(tail, tail) / rem)
+        return power < self.energy_floor
+
+    def _split(self) -> None:
+        """Close the open segment in its quietest chunk and continue a new one there."""
+        lo = max(self._seg_start, self._seg_origin + self.max_segment_samples // 2)
+        hi = self._seg_end
+        n = (hi - lo) // self.chunk_samples
+        if n == 0:
+            cut = hi
+        else:
+            # Chunks are aligned to the end of the segment; any remainder at
+            # the front is left out of the search.
+            lo = hi - n * self.chunk_samples
+            region = np.empty(hi - lo, dtype=np.int16)
+            self._read(lo, hi, region)
+            frames = region.reshape(n, self.chunk_samples).astype(np.float32)
+            energy = np.einsum("ij,ij->i", frames, frames)
+            cut = lo + int(np.argmin(energy)) * self.chunk_samples + self.chunk_samples // 2
+        self._final.append((self._seg_start, cut, True))
+        self._seg_origin = self._seg_start = cut
 
-            self._drain()
+    def pop_segments(self) -> List[VadSegment]:
+        """Return and clear buffered speech as timestamped segment pieces."""
+        out = [VadSegment(s, e, a.tobytes(), eos) for s, e, eos, a in self._spilled]
+        self._spilled = []
+        for s, e, eos in self._final:
+            piece = np.empty(e - s, dtype=np.int16)
+            self._read(s, e, piece)
+            out.append(VadSegment(s, e, piece.tobytes(), eos))
+        self._final = []
+        return out
 
     def pop_pcm(self) -> bytes:
         """Return and clear buffered speech segments as PCM16 bytes."""
-        if not self._final:
-            return b""
-        out = np.concatenate(self._final, axis=0)
-        self._final = []
-        return (out * 32768.0).astype(np.int16).tobytes()
+        return b"".join(seg.pcm for seg in self.pop_segments())
 
-    def flush_pcm(self) -> bytes:
-        """Flush remaining audio and return PCM16 bytes."""
+    def flush_segments(self) -> List[VadSegment]:
+        """Flush remaining audio and return it as timestamped segment pieces."""
         self.vad.flush()
         self._drain()
         if self._in_seg:
-            self._final.append(np.concatenate(self._cur, axis=0))
-            self._cur = []
+            self._final.append((self._seg_start, self._seg_end, True))
             self._in_seg = False
-        return self.pop_pcm()
+        return self.pop_segments()
+
+    def end_utterance(self) -> List[VadSegment]:
+        """Close the current utterance and return its remaining segment pieces.
+
+        The model starts the next utterance from a clean state, while sample
+        offsets keep counting so the session can go on serving the stream.
+        """
+        segments = self.flush_segments()
+        self.vad.reset()
+        self._pre.clear()
+        self._last_end = self._pos
+        self._gated_run = 0
+        return segments
+
+    def flush_pcm(self) -> bytes:
+        """Flush remaining audio and return PCM16 bytes."""
+        return b"".join(seg.pcm for seg in self.flush_segments())
 
     def flush_wav(self) -> Optional[bytes]:
         """Flush remaining audio and return a WAV file (for server-side use)."""
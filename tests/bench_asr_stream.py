@@ -0,0 +1,181 @@
+"""Time to first partial and to final ASR result with segment streaming.
+
+Feeds utterances through ``Orchestrator`` at real-time pace in 20 ms frames
+and records when ``asr_partial`` / ``asr_final`` events reach the
+WebSocket. The ASR service is replaced by a fake recognizer: it answers
+with a partial for every ``--partial-ms`` of received audio and with a final
+for every finished segment (and for the trailing audio at the end of the
+utterance), each ``--asr-delay-ms`` after the audio it covers arrived.
+
+Reported per utterance, averaged:
+
+- first partial: from the first frame fed to the first ``asr_partial``
+- first final: from the first frame fed to the first ``asr_final``
+- last final: from the ``flush`` request (end of the client's audio) to the
+  last ``asr_final``
+
+``--flush-only`` disables streaming, reproducing the old behaviour where
+nothing reached ASR before ``flush``. Stages run in-process by default
+(``--mode``); the language cache is seeded so LID is skipped.
+
+By default the VAD only releases a segment once it has ended, so on
+continuous speech nothing can reach ASR early; run with ``VAD_PARTIAL=1``
+(or ``VAD_MAX_SEGMENT_MS``) to stream voiced audio while it is spoken.
+
+用法：
+    PYTHONPATH=. VAD_PARTIAL=1 python tests/bench_asr_stream.py --seconds 10 --utterances 3
+    PYTHONPATH=. python tests/bench_asr_stream.py --flush-only
+"""
+
+import argparse
+import asyncio
+import time
+from pathlib import Path
+
+import numpy as np
+
+from tests.bench_common import load_pcm
+from tests.bench_pipeline import FRAME_BYTES, start_services
+
+
+class _FakeAsrStream:
+    def __init__(self, partial_packets: int, delay: float) -> None:
+        self.partial_packets = partial_packets
+        self.delay = delay
+        self.results: asyncio.Queue = asyncio.Queue()
+        self.pending: list[asyncio.Task] = []
+        self.packets = 0  # packets since the last final
+        self.total = 0
+
+    def _emit(self, is_final: bool) -> None:
+        from orchestrator.protos import asr_pb2
+
+        res = asr_pb2.Result(text=f"{self.total} packets", is_final=is_final, end_ms=self.total * 20)
+
+        async def later():
+            await asyncio.sleep(self.delay)
+            self.results.put_nowait(res)
+
+        self.pending.append(asyncio.create_task(later()))
+
+    async def write(self, frame) -> None:
+        if frame.opus is not None:
+            self.packets += 1
+            self.total += 1
+            if self.packets % self.partial_packets == 0:
+                self._emit(False)
+        elif frame.end_of_segment and self.packets:
+            self._emit(True)
+            self.packets = 0
+
+    async def done_writing(self) -> None:
+        if self.packets:
+            self._emit(True)
+        await asyncio.gather(*self.pending)
+        self.results.put_nowait(None)
+
+    def cancel(self) -> None:
+        for task in self.pending:
+            task.cancel()
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        res = await self.results.get()
+        if res is None:
+            raise StopAsyncIteration
+        return res
+
+
+class _FakeRecognizer:
+    def __init__(self, partial_packets: int, delay: float) -> None:
+        self.partial_packets = partial_packets
+        self.delay = delay
+
+    def Stream(self):
+        return _FakeAsrStream(self.partial_packets, self.delay)
+
+
+class _Ws:
+    """Timestamps the events the pipeline sends to the client."""
+
+    def __init__(self) -> None:
+        self.events: list[tuple[float, dict]] = []
+
+    async def write_message(self, msg: dict) -> None:
+        self.events.append((time.perf_counter(), msg))
+
+
+async def run(args, pcm: bytes) -> None:
+    from orchestrator.pipeline import Orchestrator
+
+    mode = args.mode
+    orch = Orchestrator(stage_modes={"vad": mode, "denoise": mode, "lid": "grpc", "compress": mode})
+    for _ in range(orch.language_cache.confirms):
+        orch.language_cache.update("bench", "English", 1.0)
+    if args.flush_only:
+        # Only flush opens the ASR stream; until then nothing is sent.
+        stream_asr = orch._stream_asr
+
+        async def held(flow_id, sess):
+            if sess["asr"].stream is not None:
+                await stream_asr(flow_id, sess)
+
+        orch._stream_asr = held
+    ws = _Ws()
+    await orch.start_flow("bench", ws, {"stream": "bench"})
+    orch.sessions["bench"]["asr"].stub = _FakeRecognizer(args.partial_ms // 20, args.asr_delay_ms / 1000)
+    rows = []
+    for _ in range(args.utterances):
+        ws.events.clear()
+        start = time.perf_counter()
+        for i in range(0, len(pcm), FRAME_BYTES):
+            await asyncio.sleep(start + i / 32000 - time.perf_counter())
+            await orch.feed_pcm("bench", pcm[i : i + FRAME_BYTES], ws)
+        await asyncio.sleep(start + len(pcm) / 32000 - time.perf_counter())
+        flushed = time.perf_counter()
+        await orch.flush("bench")
+        partials = [t for t, e in ws.events if e["type"] == "asr_partial"]
+        finals = [t for t, e in ws.events if e["type"] == "asr_final"]
+        rows.append(
+            (
+                (partials[0] - start) if partials else np.nan,
+                (finals[0] - start) if finals else np.nan,
+                (finals[-1] - flushed) if finals else np.nan,
+                len(partials),
+                len(finals),
+            )
+        )
+    orch.close_flow("bench")
+    r = np.nanmean(np.array(rows), axis=0)
+    print(
+        f"{'flush-only' if args.flush_only else 'streaming'} ({mode}, {args.seconds:g} s utterances): "
+        f"first partial {r[0] * 1000:.0f} ms, first final {r[1] * 1000:.0f} ms, "
+        f"last final {r[2] * 1000:.0f} ms after flush ({r[3]:.1f} partials, {r[4]:.1f} finals)"
+    )
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--input", default=str(Path(__file__).with_name("test.wav")))
+    ap.add_argument("--seconds", type=float, default=10.0, help="utterance length")
+    ap.add_argument("--utterances", type=int, default=3)
+    ap.add_argument("--mode", default="inproc", help="stage mode: grpc, inproc or executor")
+    ap.add_argument("--partial-ms", type=int, default=500, help="audio per fake partial result")
+    ap.add_argument("--asr-delay-ms", type=float, default=50.0, help="fake recognition delay")
+    ap.add_argument("--flush-only", action="store_true", help="send to ASR only on flush")
+    args = ap.parse_args()
+
+    pcm = load_pcm(Path(args.input), args.seconds)
+    procs = start_services(["vad", "denoise", "compress"]) if args.mode == "grpc" else []
+    try:
+        asyncio.run(run(args, pcm))
+    finally:
+        for proc in procs:
+            proc.terminate()
+            proc.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,16 @@
+"""Helpers shared by the benchmark scripts."""
+
+from pathlib import Path
+
+import numpy as np
+import soundfile as sf
+
+
+def load_pcm(wav_path: Path, seconds: float) -> bytes:
+    """Return ``seconds`` of PCM16/16k audio, looping the WAV if needed."""
+    y, sr = sf.read(str(wav_path), dtype="int16")
+    if y.ndim > 1:
+        y = y[:, 0]
+    if sr != 16000:
+        raise ValueError(f"need 16k audio, got {sr}")
+    return np.resize(y, int(seconds * sr)).astype(np.int16).tobytes()
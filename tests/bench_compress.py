@@ -0,0 +1,157 @@
+"""Benchmark the compression paths used by the orchestrator.
+
+Starts an in-process Compress gRPC server on a free port and encodes the same
+PCM through each path for every utterance length, printing the best-of-N
+latency and packets/sec:
+
+- ``unary``: one ``Encode`` call per 20 ms frame
+- ``stream``: one ``EncodeStream`` call per utterance
+- ``local``: in-process encoding on a worker thread (``COMPRESS_MODE=executor``)
+
+With ``--load N`` it instead runs a load test: N concurrent flows stream
+``--lengths`` seconds of audio in a loop for ``--duration`` seconds against
+a service started with ``--workers`` processes, and print the aggregate
+packets/sec. Run it for several ``--workers`` values to see throughput
+scale with cores.
+
+用法：
+    PYTHONPATH=. python tests/bench_compress.py --lengths 1,10,60 --repeat 3
+    PYTHONPATH=. python tests/bench_compress.py --load 32 --workers 4 --load-procs 4
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import grpc
+import numpy as np
+
+from orchestrator.modules.compress_client import CompressClient, LocalCompressClient
+from services.compress.protos import compress_pb2_grpc
+from services.compress.server import CompressServicer
+from tests.bench_common import load_pcm
+
+
+async def start_server() -> tuple[grpc.aio.Server, int]:
+    server = grpc.aio.server()
+    compress_pb2_grpc.add_CompressServicer_to_server(CompressServicer(), server)
+    port = server.add_insecure_port("127.0.0.1:0")
+    await server.start()
+    return server, port
+
+
+async def run(target: str | None, audio: np.ndarray, lengths: list[float], modes: list[str], repeat: int) -> None:
+    server = None
+    if not target:
+        server, port = await start_server()
+        target = f"127.0.0.1:{port}"
+    remote = CompressClient(target, flow_id="bench")
+    local = LocalCompressClient(flow_id="bench")
+    paths = {"unary": remote.encode_unary, "stream": remote.encode, "local": local.encode}
+    try:
+        for mode in modes:
+            await paths[mode](audio[:16000].tobytes())  # warm up channel, server and encoder
+        print(f"{'length':>8} {'mode':>7} {'packets':>8} {'latency':>11} {'packets/s':>11}")
+        for seconds in lengths:
+            pcm = audio[: int(seconds * 16000)].tobytes()
+            for mode in modes:
+                best = float("inf")
+                packets = 0
+                for _ in range(repeat):
+                    t0 = time.perf_counter()
+                    packets = len(await paths[mode](pcm))
+                    best = min(best, time.perf_counter() - t0)
+                print(
+                    f"{seconds:>7g}s {mode:>7} {packets:>8} {best * 1000:>8.1f} ms "
+                    f"{packets / best:>11,.0f}"
+                )
+    finally:
+        await remote.channel.close()
+        if server is not None:
+            await server.stop(None)
+
+
+async def load_flows(target: str, pcm: bytes, flows: int, duration: float) -> int:
+    """Stream ``pcm`` repeatedly on ``flows`` concurrent flows; return packets encoded."""
+    clients = [CompressClient(target, flow_id=f"load-{i}") for i in range(flows)]
+    deadline = time.perf_counter() + duration
+
+    async def run_flow(client: CompressClient) -> int:
+        packets = 0
+        while time.perf_counter() < deadline:
+            packets += len(await client.encode(pcm))
+        return packets
+
+    try:
+        return sum(await asyncio.gather(*(run_flow(c) for c in clients)))
+    finally:
+        for client in clients:
+            await client.channel.close()
+
+
+def _load_proc(args: tuple) -> int:
+    return asyncio.run(load_flows(*args))
+
+
+def run_load(target: str, pcm: bytes, flows: int, procs: int, duration: float) -> None:
+    shares = [flows // procs + (i < flows % procs) for i in range(procs)]
+    jobs = [(target, pcm, n, duration) for n in shares if n]
+    t0 = time.perf_counter()
+    with multiprocessing.get_context("spawn").Pool(len(jobs)) as pool:
+        packets = sum(pool.map(_load_proc, jobs))
+    elapsed = time.perf_counter() - t0
+    print(f"load: {flows} flows, {packets} packets in {elapsed:.1f} s -> {packets / elapsed:,.0f} packets/s")
+
+
+def start_workers(workers: int) -> tuple[subprocess.Popen, int]:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    env = dict(os.environ, COMPRESS_PORT=str(port), COMPRESS_WORKERS=str(workers))
+    proc = subprocess.Popen([sys.executable, "-m", "services.compress.server"], env=env)
+    time.sleep(2.0)  # let the workers bind
+    return proc, port
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--input", default=str(Path(__file__).with_name("test.wav")))
+    ap.add_argument("--lengths", default="1,5,10,30,60", help="utterance lengths in seconds")
+    ap.add_argument("--modes", default="unary,stream,local")
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--target", help="existing Compress service; default starts one in-process")
+    ap.add_argument("--load", type=int, default=0, help="run a load test with this many flows")
+    ap.add_argument("--load-procs", type=int, default=1, help="client processes generating load")
+    ap.add_argument("--workers", type=int, default=1, help="server processes for the load test")
+    ap.add_argument("--duration", type=float, default=10.0, help="load test duration in seconds")
+    args = ap.parse_args()
+
+    if args.load:
+        pcm = load_pcm(Path(args.input), float(args.lengths.split(",")[0]))
+        proc = None
+        target = args.target
+        if not target:
+            proc, port = start_workers(args.workers)
+            target = f"localhost:{port}"
+        try:
+            run_load(target, pcm, args.load, args.load_procs, args.duration)
+        finally:
+            if proc is not None:
+                proc.terminate()
+                proc.wait()
+        return
+
+    lengths = [float(x) for x in args.lengths.split(",")]
+    modes = args.modes.split(",")
+    audio = np.frombuffer(load_pcm(Path(args.input), max(lengths)), dtype=np.int16)
+    asyncio.run(run(args.target, audio, lengths, modes, args.repeat))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+"""Benchmark LID inference paths, batching and backends.
+
+Loads the LID backend selected by ``LID_BACKEND`` once and classifies the same PCM through both paths for
+every utterance length, printing the best-of-N latency:
+
+- ``file``: wrap the PCM in a WAV, write it to a temporary file and call
+  ``classify_file`` (how ``Detect`` used to work; SpeechBrain only)
+- ``memory``: ``classify_pcm`` on the request bytes
+
+With ``--load N`` it instead runs N concurrent clients, each sending
+utterances of a random length from ``--lengths`` back to back for
+``--duration`` seconds, through ``LidBatcher`` for every combination of
+``--batch-max`` and ``--wait-ms``, and prints throughput and latency
+percentiles, the curve to tune the batching knobs against.
+
+With ``--backends speechbrain,whisper`` it loads each backend in a fresh
+process and reports its startup time, resident memory and latency per
+length; with ``--test-set DIR`` it also classifies every WAV in DIR and
+prints how often the backends agree on the label.
+
+用法：
+    PYTHONPATH=. python tests/bench_lid.py --lengths 1,5,10,30 --repeat 5
+    PYTHONPATH=. python tests/bench_lid.py --load 16 --lengths 1,2,4 --batch-max 1,4,8,16 --wait-ms 5,20
+    PYTHONPATH=. python tests/bench_lid.py --backends speechbrain,whisper --test-set data/lid_test
+"""
+
+import argparse
+import asyncio
+import io
+import multiprocessing
+import os
+import random
+import tempfile
+import time
+import wave
+from pathlib import Path
+
+import soundfile as sf
+
+from services.lid.backends import make_backend
+from services.lid.batch import LidBatcher
+from services.lid.executor import InferenceExecutor
+from tests.bench_common import load_pcm
+
+
+def rss_mib() -> float:
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def classify_via_file(model, pcm: bytes) -> tuple[str, float]:
+    with io.BytesIO() as buf:
+        with wave.open(buf, "wb") as wf:
+            wf.setnchannels(1)
+            wf.setsampwidth(2)
+            wf.setframerate(16000)
+            wf.writeframes(pcm)
+        wav_bytes = buf.getvalue()
+    with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as f:
+        f.write(wav_bytes)
+        tmp_path = f.name
+    try:
+        _, score, _, language = model.classify_file(tmp_path)
+        return language[0], float(score)
+    finally:
+        os.remove(tmp_path)
+
+
+async def run_load(batcher: LidBatcher, utterances: list[bytes], clients: int, duration: float) -> list[float]:
+    """Send utterances from ``clients`` concurrent callers; return per-request latencies."""
+    deadline = time.perf_counter() + duration
+    latencies: list[float] = []
+
+    async def client(seed: int) -> None:
+        rng = random.Random(seed)
+        while time.perf_counter() < deadline:
+            t0 = time.perf_counter()
+            await batcher.detect(rng.choice(utterances), 16000)
+            latencies.append(time.perf_counter() - t0)
+
+    await asyncio.gather(*(client(i) for i in range(clients)))
+    return latencies
+
+
+def bench_load(classify_batch, audio: bytes, lengths: list[float], args: argparse.Namespace) -> None:
+    utterances = [audio[: int(s * 16000) * 2] for s in lengths]
+    print(f"{'batch':>5} {'wait':>7} {'req/s':>8} {'p50':>9} {'p99':>9} {'avg batch':>9}")
+    for max_batch in (int(x) for x in args.batch_max.split(",")):
+        for wait_ms in (float(x) for x in args.wait_ms.split(",")):
+            executor = InferenceExecutor("thread", args.workers, max_queue=args.load)
+            batcher = LidBatcher(classify_batch, executor, wait_ms, max_batch)
+            t0 = time.perf_counter()
+            lat = sorted(asyncio.run(run_load(batcher, utterances, args.load, args.duration)))
+            elapsed = time.perf_counter() - t0
+            executor.close()
+            p50, p99 = lat[len(lat) // 2], lat[min(len(lat) - 1, int(len(lat) * 0.99))]
+            print(
+                f"{max_batch:>5} {wait_ms:>5g}ms {len(lat) / elapsed:>8.1f} {p50 * 1000:>6.0f} ms "
+                f"{p99 * 1000:>6.0f} ms {batcher.stats()['avg_batch']:>9.1f}"
+            )
+
+
+def profile_backend(name: str, audio: bytes, lengths: list[float], repeat: int, test_set: list[str]) -> dict:
+    """Load one backend and measure it; meant to run in a fresh process."""
+    base = rss_mib()
+    t0 = time.perf_counter()
+    backend = make_backend(name)
+    startup = time.perf_counter() - t0
+    backend.classify(audio[: 16000 * 2])  # warm up
+    latency = {}
+    for seconds in lengths:
+        pcm = audio[: int(seconds * 16000) * 2]
+        best = float("inf")
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            backend.classify(pcm)
+            best = min(best, time.perf_counter() - t0)
+        latency[seconds] = best
+    labels = [backend.classify(load_pcm(Path(p), sf.info(p).duration))[0] for p in test_set]
+    return {"startup": startup, "rss": rss_mib() - base, "latency": latency, "labels": labels}
+
+
+def compare_backends(names: list[str], audio: bytes, lengths: list[float], repeat: int, test_dir: str | None) -> None:
+    test_set = sorted(str(p) for p in Path(test_dir).glob("*.wav")) if test_dir else []
+    ctx = multiprocessing.get_context("spawn")
+    results = {}
+    for name in names:
+        with ctx.Pool(1) as pool:
+            results[name] = pool.apply(profile_backend, (name, audio, lengths, repeat, test_set))
+    print(f"{'backend':>12} {'startup':>9} {'rss':>9} " + " ".join(f"{f'{s:g}s':>9}" for s in lengths))
+    for name, r in results.items():
+        lat = " ".join(f"{r['latency'][s] * 1000:>6.1f} ms" for s in lengths)
+        print(f"{name:>12} {r['startup']:>7.2f} s {r['rss']:>5.0f} MiB {lat}")
+    if test_set:
+        ref, *others = names
+        for name in others:
+            same = sum(a == b for a, b in zip(results[ref]["labels"], results[name]["labels"]))
+            print(f"label agreement {ref} vs {name}: {same}/{len(test_set)} ({same / len(test_set):.1%})")
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--input", default=str(Path(__file__).with_name("test.wav")))
+    ap.add_argument("--lengths", default="1,5,10,30", help="utterance lengths in seconds")
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--load", type=int, default=0, help="run a batching load test with N clients")
+    ap.add_argument("--batch-max", default="1,4,8,16")
+    ap.add_argument("--wait-ms", default="5,20")
+    ap.add_argument("--workers", type=int, default=1)
+    ap.add_argument("--duration", type=float, default=20.0)
+    ap.add_argument("--backends", help="compare these backends, e.g. speechbrain,whisper")
+    ap.add_argument("--test-set", help="directory of 16k WAVs for the label agreement check")
+    args = ap.parse_args()
+
+    lengths = [float(x) for x in args.lengths.split(",")]
+    audio = load_pcm(Path(args.input), max(lengths))
+    if args.backends:
+        compare_backends(args.backends.split(","), audio, lengths, args.repeat, args.test_set)
+        return
+
+    from services.lid import server  # loads the LID_BACKEND model
+
+    if args.load:
+        server.classify_pcm(audio[: 16000 * 2])  # warm up
+        bench_load(server.classify_pcm_batch, audio, lengths, args)
+        return
+    paths = {"memory": server.classify_pcm}
+    if server.backend.name == "speechbrain":
+        paths = {"file": lambda pcm: classify_via_file(server.backend.model, pcm), **paths}
+    for fn in paths.values():
+        fn(audio[: 16000 * 2])  # warm up
+    print(f"{'length':>8} {'path':>7} {'latency':>11} {'label':>20}")
+    for seconds in lengths:
+        pcm = audio[: int(seconds * 16000) * 2]
+        for name, fn in paths.items():
+            best = float("inf")
+            for _ in range(args.repeat):
+                t0 = time.perf_counter()
+                label, score = fn(pcm)
+                best = min(best, time.perf_counter() - t0)
+            print(f"{seconds:>7g}s {name:>7} {best * 1000:>8.1f} ms {label:>20} ({score:.3f})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+"""End-to-end latency of the orchestrator pipeline per stage mode.
+
+Starts the VAD, Denoise and Compress services as subprocesses on free ports
+(as ``start.sh`` would, minus the fixed ports), then streams the same audio
+through ``Orchestrator`` in 20 ms frames for each ``--modes`` entry, binding
+every stage to that mode (``grpc``, ``inproc`` or ``executor``). Each
+utterance is fed as fast as the pipeline accepts it, or at real-time pace
+with ``--realtime``, and then flushed. Prints per-frame ``feed_pcm`` latency
+(mean / p50 / p99), the ``flush`` latency from the last frame to the ``end``
+event, the orchestrator process's CPU time per second of audio (service
+processes not included) and the wall-clock real-time factor.
+
+The gRPC VAD client does not wait for the service on ``feed_pcm``, so when
+fed unpaced its backlog shows up in ``flush``; ``--realtime`` gives the
+latency a live caller sees.
+
+LID needs its model. Without ``--lid`` the language cache is seeded for the
+bench stream, so every utterance reuses the cached language and LID is never
+called; with ``--lid`` a LID service is started too and LID runs on every
+utterance. The ASR stage is the repository's stub and does no I/O.
+
+用法：
+    PYTHONPATH=. python tests/bench_pipeline.py --seconds 10 --utterances 5
+    PYTHONPATH=. python tests/bench_pipeline.py --realtime --modes grpc,inproc --lid
+"""
+
+import argparse
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+from tests.bench_common import load_pcm
+
+SERVICES = {
+    "vad": ("VAD_PORT", "services.vad.server"),
+    "denoise": ("DENOISE_PORT", "services.denoise.server"),
+    "compress": ("COMPRESS_PORT", "services.compress.server"),
+    "lid": ("LID_PORT", "services.lid.server"),
+}
+FRAME_BYTES = 16000 * 20 // 1000 * 2
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_services(names: list[str]) -> list[subprocess.Popen]:
+    """Start each service on a free port and export the port for the clients."""
+    procs = []
+    for name in names:
+        env_var, module = SERVICES[name]
+        port = free_port()
+        os.environ[env_var] = str(port)
+        procs.append(subprocess.Popen([sys.executable, "-m", module], env=dict(os.environ, LOG_LEVEL="WARNING")))
+        wait_listening(port, procs[-1])
+    return procs
+
+
+def wait_listening(port: int, proc: subprocess.Popen, timeout: float = 120.0) -> None:
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            return
+        except OSError:
+            if proc.poll() is not None or time.monotonic() > deadline:
+                raise RuntimeError(f"service on port {port} did not start")
+            time.sleep(0.2)
+
+
+class _Ws:
+    """Collects the events the pipeline would send to the client."""
+
+    def __init__(self) -> None:
+        self.events: list[dict] = []
+
+    async def write_message(self, msg: dict) -> None:
+        self.events.append(msg)
+
+
+async def run_mode(mode: str, pcm: bytes, utterances: int, lid: bool, realtime: bool) -> dict:
+    from orchestrator.pipeline import Orchestrator
+
+    modes = {"vad": mode, "denoise": mode, "lid": mode if lid else "grpc", "compress": mode}
+    orch = Orchestrator(stage_modes=modes)
+    if not lid:
+        for _ in range(orch.language_cache.confirms):
+            orch.language_cache.update("bench", "English", 1.0)
+    ws = _Ws()
+    await orch.start_flow("bench", ws, {"stream": "bench"})
+    # One warm-up utterance opens the streams and loads the in-process models.
+    for i in range(0, len(pcm), FRAME_BYTES):
+        await orch.feed_pcm("bench", pcm[i : i + FRAME_BYTES], ws)
+    await orch.flush("bench")
+    feeds: list[float] = []
+    flushes: list[float] = []
+    cpu0, wall0 = time.process_time(), time.perf_counter()
+    for _ in range(utterances):
+        start = time.perf_counter()
+        for i in range(0, len(pcm), FRAME_BYTES):
+            if realtime:
+                await asyncio.sleep(start + i / 32000 - time.perf_counter())
+            t0 = time.perf_counter()
+            await orch.feed_pcm("bench", pcm[i : i + FRAME_BYTES], ws)
+            feeds.append(time.perf_counter() - t0)
+        t0 = time.perf_counter()
+        await orch.flush("bench")
+        flushes.append(time.perf_counter() - t0)
+    cpu, wall = time.process_time() - cpu0, time.perf_counter() - wall0
+    orch.close_flow("bench")
+    audio_sec = utterances * len(pcm) / 32000
+    feeds_ms = np.array(feeds) * 1000
+    return {
+        "feed_mean": feeds_ms.mean(),
+        "feed_p50": np.percentile(feeds_ms, 50),
+        "feed_p99": np.percentile(feeds_ms, 99),
+        "flush": np.mean(flushes) * 1000,
+        "cpu": cpu / audio_sec * 1000,
+        "rtf": wall / audio_sec,
+    }
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--input", default=str(Path(__file__).with_name("test.wav")))
+    ap.add_argument("--seconds", type=float, default=10.0, help="utterance length")
+    ap.add_argument("--utterances", type=int, default=5)
+    ap.add_argument("--modes", default="grpc,executor,inproc")
+    ap.add_argument("--lid", action="store_true", help="run LID (needs the LID model)")
+    ap.add_argument("--realtime", action="store_true", help="feed frames at real-time pace")
+    args = ap.parse_args()
+
+    pcm = load_pcm(Path(args.input), args.seconds)
+    # Service ports are read when the orchestrator modules are imported,
+    # which run_mode does after this.
+    procs = start_services(["vad", "denoise", "compress"] + (["lid"] if args.lid else []))
+    try:
+        print(
+            f"{'mode':>9} {'feed mean':>10} {'p50':>8} {'p99':>8} {'flush':>9} "
+            f"{'orch CPU/s audio':>17} {'RTF':>7}"
+        )
+        for mode in args.modes.split(","):
+            r = asyncio.run(run_mode(mode, pcm, args.utterances, args.lid, args.realtime))
+            print(
+                f"{mode:>9} {r['feed_mean']:>7.3f} ms {r['feed_p50']:>5.3f} ms {r['feed_p99']:>5.3f} ms "
+                f"{r['flush']:>6.1f} ms {r['cpu']:>14.1f} ms {r['rtf']:>7.4f}"
+            )
+    finally:
+        for proc in procs:
+            proc.terminate()
+            proc.wait()
+
+
+if __name__ == "__main__":
+    main()
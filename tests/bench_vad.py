@@ -0,0 +1,152 @@
+"""Microbenchmark ``VadSession`` the way the VAD service drives it.
+
+Feeds PCM16 in 20 ms frames, calling ``pop_pcm`` after every frame, and
+reports CPU time per frame, the real-time factor and the peak memory
+allocated by Python and NumPy while streaming, on top of what the session
+holds right after it is created.
+
+With ``--streams N`` it instead drives N concurrent streams on one event
+loop, with inference inline as in the service (one call per stream per
+frame), and reports how many real-time streams one core sustains.
+
+With ``--silence F`` the audio is cut into 2 s pieces and a fraction F of
+them is replaced by digital silence or -70 dBFS noise, and the session is
+timed with and without the energy pre-gate, reporting evaluated vs skipped
+chunks and the CPU saved.
+
+用法：
+    PYTHONPATH=. python tests/bench_vad.py --seconds 60
+    PYTHONPATH=. python tests/bench_vad.py --streams 200 --seconds 10
+    PYTHONPATH=. python tests/bench_vad.py --silence 0.7 --seconds 60
+"""
+
+import argparse
+import asyncio
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+
+from services.vad.vad import make_vad_session
+from tests.bench_common import load_pcm
+
+
+def silence_heavy(pcm: bytes, fraction: float, seed: int = 0) -> bytes:
+    """Replace ``fraction`` of 2 s pieces with digital silence or line-level noise."""
+    rng = np.random.default_rng(seed)
+    y = np.frombuffer(pcm, dtype=np.int16).copy()
+    piece = 2 * 16000
+    for off in range(0, y.size, piece):
+        if rng.random() >= fraction:
+            continue
+        n = min(piece, y.size - off)
+        if rng.random() < 0.5:
+            y[off : off + n] = 0
+        else:
+            y[off : off + n] = rng.normal(0.0, 32768 * 10 ** (-70 / 20), n).astype(np.int16)
+    return y.tobytes()
+
+
+def run_session(pcm: bytes, frame_bytes: int, trace: dict | None = None, stats: dict | None = None, **kw) -> int:
+    sess = make_vad_session(**kw)
+    if trace is not None:
+        tracemalloc.reset_peak()
+        trace["base"] = tracemalloc.get_traced_memory()[0]
+    out = 0
+    for i in range(0, len(pcm), frame_bytes):
+        sess.accept_pcm16(pcm[i : i + frame_bytes])
+        out += len(sess.pop_pcm())
+    out += len(sess.flush_pcm())
+    if stats is not None:
+        stats.update(sess.stats())
+    return out
+
+
+def bench_gate(pcm: bytes, frame_bytes: int, repeat: int) -> None:
+    frames = -(-len(pcm) // frame_bytes)
+    cpu = {}
+    for name, floor in (("no gate", float("-inf")), ("gate", None)):
+        kw = {} if floor is None else {"energy_floor_db": floor}
+        stats: dict = {}
+        best = float("inf")
+        for _ in range(repeat):
+            t0 = time.process_time()
+            voiced = run_session(pcm, frame_bytes, stats=stats, **kw)
+            best = min(best, time.process_time() - t0)
+        cpu[name] = best
+        print(
+            f"{name:>7}: cpu {best * 1000:.1f} ms, {best / frames * 1e6:.1f} us/frame, "
+            f"evaluated {stats['evaluated_chunks']}, skipped {stats['skipped_chunks']} (voiced {voiced} bytes)"
+        )
+    print(f"cpu saved: {(1 - cpu['gate'] / cpu['no gate']) * 100:.1f}%")
+
+
+async def run_streams(pcm: bytes, frame_bytes: int, sessions: list) -> int:
+    """Drive every session through ``pcm`` concurrently, frame by frame."""
+
+    async def stream(sess) -> int:
+        out = 0
+        for i in range(0, len(pcm), frame_bytes):
+            sess.accept_pcm16(pcm[i : i + frame_bytes])
+            out += len(sess.pop_pcm())
+            await asyncio.sleep(0)  # let the other streams in, as gRPC would
+        return out + len(sess.flush_pcm())
+
+    return sum(await asyncio.gather(*(stream(s) for s in sessions)))
+
+
+def bench_streams(pcm: bytes, frame_bytes: int, streams: int, seconds: float) -> None:
+    sessions = [make_vad_session() for _ in range(streams)]
+    t0, w0 = time.process_time(), time.perf_counter()
+    voiced = asyncio.run(run_streams(pcm, frame_bytes, sessions))
+    cpu, wall = time.process_time() - t0, time.perf_counter() - w0
+    print(
+        f"{streams} streams x {seconds:g} s, cpu {cpu:.2f} s, wall {wall:.2f} s, "
+        f"{streams * seconds / cpu:.1f} real-time streams per core (voiced {voiced} bytes)"
+    )
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--input", default=str(Path(__file__).with_name("test.wav")))
+    ap.add_argument("--seconds", type=float, default=60.0)
+    ap.add_argument("--frame-ms", type=int, default=20)
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--streams", type=int, default=0, help="run N concurrent streams")
+    ap.add_argument("--silence", type=float, default=0.0, help="compare with/without the energy gate")
+    args = ap.parse_args()
+
+    pcm = load_pcm(Path(args.input), args.seconds)
+    frame_bytes = 16000 * args.frame_ms // 1000 * 2
+    frames = -(-len(pcm) // frame_bytes)
+    if args.silence:
+        pcm = silence_heavy(pcm, args.silence)
+        run_session(pcm[: 16000 * 2], frame_bytes)
+        bench_gate(pcm, frame_bytes, args.repeat)
+        return
+    if args.streams:
+        bench_streams(pcm, frame_bytes, args.streams, args.seconds)
+        return
+
+    run_session(pcm[: 16000 * 2], frame_bytes)  # load the model once before timing
+    best = float("inf")
+    voiced = 0
+    for _ in range(args.repeat):
+        t0 = time.process_time()
+        voiced = run_session(pcm, frame_bytes)
+        best = min(best, time.process_time() - t0)
+
+    trace: dict = {}
+    tracemalloc.start()
+    run_session(pcm, frame_bytes, trace)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(f"audio: {args.seconds:g} s in {frames} frames, voiced output {voiced} bytes")
+    print(f"cpu: {best * 1000:.1f} ms total, {best / frames * 1e6:.1f} us/frame, RTF {best / args.seconds:.4f}")
+    print(f"peak memory while streaming: {(peak - trace['base']) / 1024:.1f} KiB")
+
+
+if __name__ == "__main__":
+    main()